@@ -1,44 +1,44 @@
 # api_service.py
-import requests
-import json
 import os
-from datetime import datetime, timedelta
+from datetime import timedelta
+
+from http_client import AuthError, CircuitOpenError, PetfinderError, RateLimitError, TransientError, request
+import metrics
+from rate_budget import request_budget
+from catalog import shared_catalog
+from filters import to_params
+from page_decoder import AnimalStream, DecodeError
+from query_cache import QueryCache
+from summaries import summary_cache
+from token_manager import TokenManager
 
 # Petfinder API credentials - set these as environment variables
 CLIENT_ID = os.getenv("PETFINDER_CLIENT_ID")
 CLIENT_SECRET = os.getenv("PETFINDER_CLIENT_SECRET")
 
-CACHE_FILE = "dogs_cache.json"
+API_BASE = os.getenv("PETFINDER_API_BASE", "https://api.petfinder.com/v2")
+
+DEFAULT_LOCATION = "85004"
+PAGE_SIZE = 10
+
 CACHE_DURATION = timedelta(hours=1)
 
-def save_cache(data):
-    """Save data to cache file with timestamp."""
-    try:
-        with open(CACHE_FILE, 'w') as f:
-            json.dump({"timestamp": datetime.now().isoformat(), "data": data}, f)
-    except Exception as e:
-        print(f"Error saving cache: {e}")
-
-def load_cache():
-    """Load cached data if it exists and is still valid."""
-    if os.path.exists(CACHE_FILE):
-        try:
-            with open(CACHE_FILE, 'r') as f:
-                cache = json.load(f)
-                cache_time = datetime.fromisoformat(cache["timestamp"])
-                if datetime.now() - cache_time < CACHE_DURATION:
-                    return cache["data"]
-        except Exception as e:
-            print(f"Error loading cache: {e}")
-    return None
+# Serve pages only from the shared cache that ingest_worker.py keeps warm; never call the API
+READ_ONLY = os.getenv("PETLIGHTS_READ_ONLY", "0") == "1"
 
-def get_token():
-    """Get OAuth token from Petfinder API."""
-    if not CLIENT_ID or not CLIENT_SECRET:
-        print("Warning: Petfinder API credentials not found in environment variables")
-        return None
-    
-    url = "https://api.petfinder.com/v2/oauth2/token"
+_query_cache = QueryCache(ttl=CACHE_DURATION.total_seconds())
+
+def save_cache(params, data):
+    """Save the result for a query to the shared cache."""
+    _query_cache.set(params, data)
+
+def load_cache(params):
+    """Load the cached result for a query if it exists and is still valid."""
+    return _query_cache.get(params)
+
+def _request_token():
+    """Request a new OAuth token from Petfinder."""
+    url = f"{API_BASE}/oauth2/token"
     data = {
         "grant_type": "client_credentials",
         "client_id": CLIENT_ID,
@@ -46,76 +46,210 @@ def get_token():
     }
     
     try:
-        response = requests.post(url, data=data)
-        response.raise_for_status()
-        token_data = response.json()
-        return token_data.get("access_token")
-    except requests.exceptions.RequestException as e:
+        response = request("POST", url, data=data)
+        return response.json()
+    except (PetfinderError, ValueError) as e:
         print(f"Error getting token: {e}")
         return None
 
-def fetch_dogs(token, location="85004", limit=10):
-    """Fetch dogs from Petfinder API with caching."""
-    # Check cache first
-    cached = load_cache()
-    if cached:
-        print("Using cached dog data")
-        return cached
+_token_manager = TokenManager(_request_token, client_id=CLIENT_ID)
+
+def get_token():
+    """Get OAuth token from Petfinder API, reusing the cached one until it nears expiry."""
+    if not CLIENT_ID or not CLIENT_SECRET:
+        print("Warning: Petfinder API credentials not found in environment variables")
+        return None
     
-    if not token:
-        print("No token provided")
-        return []
+    return _token_manager.get()
+
+def budget_state():
+    """Remaining request budget (per-second bucket and daily quota) and who is waiting for it."""
+    return request_budget.state()
+
+def _normalize_animal(animal):
+    """Turn a raw Petfinder animal into the flat dict the app renders, card fields included."""
+    # Get the best available photo
+    photos = animal.get("photos", [])
+    photo_url = photos[0]["large"] if photos else "https://via.placeholder.com/500?text=No+Photo"
+    
+    # Build breed string
+    breeds = animal.get("breeds", {})
+    breed_parts = []
+    if breeds.get("primary"):
+        breed_parts.append(breeds["primary"])
+    if breeds.get("secondary"):
+        breed_parts.append(breeds["secondary"])
+    breed = ", ".join(breed_parts) if breed_parts else "Mixed Breed"
+    
+    address = (animal.get("contact") or {}).get("address") or {}
+    city_state = ", ".join(part for part in (address.get("city"), address.get("state")) if part)
+    
+    dog = {
+        "id": animal.get("id"),
+        "name": animal.get("name", "Unknown"),
+        "breed": breed,
+        "age": animal.get("age", "Unknown"),
+        "gender": animal.get("gender", "Unknown"),
+        "size": animal.get("size", "Unknown"),
+        "photo": photo_url,
+        "description": animal.get("description") or "No description available.",
+        "url": animal.get("url", "https://www.petfinder.com"),
+        "status": animal.get("status", "adoptable"),
+        "location": city_state or "Unknown",
+        "postcode": address.get("postcode"),
+        "published_at": animal.get("published_at"),
+        "status_changed_at": animal.get("status_changed_at"),
+        # Miles from the searched location; only set when the query had one
+        "distance": animal.get("distance")
+    }
+    # Cleaned text, truncations and summary; cached per listing version
+    dog.update(summary_cache.get(dog))
+    return dog
+
+def fetch_page(token, location=DEFAULT_LOCATION, limit=PAGE_SIZE, page=1, filters=None):
+    """Fetch one page of dogs plus Petfinder's pagination block.
     
-    url = "https://api.petfinder.com/v2/animals"
-    headers = {"Authorization": f"Bearer {token}"}
+    `filters` (see filters.to_params) are applied by Petfinder, and each
+    combination is cached separately.
+    
+    Goes through the process-wide catalog, so concurrent sessions asking for
+    the same page share one request and one read-only result. Expired pages
+    are returned immediately with `"stale": True` while they refresh.
+    In read-only mode pages come from the shared cache alone.
+    """
+    return fetch_query(token, page_params(location, limit, page, filters))
+
+def fetch_query(token, params):
+    """Like fetch_page, for arbitrary /animals params."""
+    if READ_ONLY:
+        load_fresh = lambda: None
+    else:
+        load_fresh = lambda: _fetch_page_from_api(token, params)
+    return shared_catalog.get(
+        params,
+        load_fresh=load_fresh,
+        load_cached=lambda: _query_cache.get_entry(params),
+    )
+
+def page_params(location=DEFAULT_LOCATION, limit=PAGE_SIZE, page=1, filters=None):
+    """The /animals params for one deck page; also the shared cache key."""
     params = {
         "type": "dog",
         "location": location,
         "limit": limit,
+        "page": page,
         "status": "adoptable"
     }
+    params.update(to_params(filters))
+    return params
+
+def refresh_page(token, location=DEFAULT_LOCATION, limit=PAGE_SIZE, page=1, filters=None):
+    """Fetch a deck page from the API into the shared cache, bypassing any cached copy."""
+    return refresh_query(token, page_params(location, limit, page, filters))
+
+def refresh_query(token, params):
+    """Like refresh_page, for arbitrary /animals params."""
+    return _fetch_page_from_api(token, params)
+
+def _fetch_page_from_api(token, params):
+    """Fetch a page from the API and store it in the query cache."""
+    result = search_animals(token, params)
+    if result is None:
+        return None
+    
+    save_cache(params, result)
+    print(f"Fetched {len(result['dogs'])} dogs from API (page {params['page']})")
+    return result
+
+def search_animals(token, params, seen=None):
+    """Call /animals with arbitrary search params, uncached, and normalize the page.
+    
+    Animals whose id is in `seen` (a SeenSet) are dropped before normalization.
+    """
+    stream = stream_animals(token, params, seen=seen)
+    if stream is None:
+        return None
+    with metrics.timed("petlights_normalize_seconds"):
+        dogs = list(stream)
+    return {
+        "dogs": dogs,
+        "pagination": stream.pagination,
+    }
+
+def stream_animals(token, params, seen=None):
+    """Call /animals and return a NormalizedStream over its dogs, or None without a token.
     
+    Dogs are normalized one at a time as the body is decoded, so a 100-animal
+    page never exists as raw JSON and normalized dicts at the same time.
+    """
+    if not token:
+        print("No token provided")
+        return None
+    
+    url = f"{API_BASE}/animals"
     try:
-        response = requests.get(url, headers=headers, params=params)
-        response.raise_for_status()
-        data = response.json()
-        
-        dogs = []
-        for animal in data.get("animals", []):
-            # Get the best available photo
-            photos = animal.get("photos", [])
-            photo_url = photos[0]["large"] if photos else "https://via.placeholder.com/500?text=No+Photo"
-            
-            # Build breed string
-            breeds = animal.get("breeds", {})
-            breed_parts = []
-            if breeds.get("primary"):
-                breed_parts.append(breeds["primary"])
-            if breeds.get("secondary"):
-                breed_parts.append(breeds["secondary"])
-            breed = ", ".join(breed_parts) if breed_parts else "Mixed Breed"
-            
-            dog = {
-                "id": animal.get("id"),
-                "name": animal.get("name", "Unknown"),
-                "breed": breed,
-                "age": animal.get("age", "Unknown"),
-                "gender": animal.get("gender", "Unknown"),
-                "size": animal.get("size", "Unknown"),
-                "photo": photo_url,
-                "description": animal.get("description", "No description available."),
-                "url": animal.get("url", "https://www.petfinder.com")
-            }
-            dogs.append(dog)
-        
-        # Save to cache
-        save_cache(dogs)
-        print(f"Fetched {len(dogs)} dogs from API")
-        return dogs
+        response = request("GET", url, headers={"Authorization": f"Bearer {token}"}, params=params, stream=True)
+    except AuthError:
+        # Token was revoked or expired early; get a fresh one and try once more
+        _token_manager.invalidate()
+        token = get_token()
+        if not token:
+            raise
+        response = request("GET", url, headers={"Authorization": f"Bearer {token}"}, params=params, stream=True)
+    return NormalizedStream(AnimalStream(response), seen)
+
+class NormalizedStream:
+    """Yields normalized dogs from an AnimalStream; `pagination` is set once it's exhausted."""
+    
+    def __init__(self, animals, seen=None):
+        self._animals = animals
+        self._seen = seen
+    
+    @property
+    def pagination(self):
+        return self._animals.pagination
+    
+    def __iter__(self):
+        kept = set()
+        count = 0
+        try:
+            for animal in self._animals:
+                animal_id = animal.get("id")
+                if self._seen is not None and (animal_id in kept or animal_id in self._seen):
+                    continue
+                kept.add(animal_id)
+                count += 1
+                yield _normalize_animal(animal)
+        except DecodeError as e:
+            raise TransientError(f"Failed to fetch dogs: invalid JSON response ({e})")
+        finally:
+            metrics.inc("petlights_animals_normalized_total", count)
+
+def fetch_dogs(token, location=DEFAULT_LOCATION, limit=PAGE_SIZE, page=1, seen=None, filters=None):
+    """Fetch one page of dogs from Petfinder API with caching, minus any in `seen`."""
+    dogs = fetch_page(token, location=location, limit=limit, page=page, filters=filters)["dogs"]
+    return list(dogs) if seen is None else seen.unseen(dogs)
+
+def iter_dog_pages(location=DEFAULT_LOCATION, limit=PAGE_SIZE, start_page=1, filters=None):
+    """Lazily yield successive pages of dogs, fetching each one only when asked for."""
+    page = start_page
+    while True:
+        result = fetch_page(get_token(), location=location, limit=limit, page=page, filters=filters)
+        if not result["dogs"]:
+            return
+        yield result["dogs"]
         
-    except requests.exceptions.RequestException as e:
-        error_msg = str(e)
-        if "429" in error_msg:
-            raise Exception(f"Failed to fetch dogs: 429 Rate Limit Exceeded")
-        else:
-            raise Exception(f"Failed to fetch dogs: {error_msg}")
+        total_pages = result["pagination"].get("total_pages")
+        if total_pages is not None and page >= total_pages:
+            return
+        page += 1
+
+def iter_dogs(location=DEFAULT_LOCATION, limit=PAGE_SIZE, start_page=1, seen=None, filters=None):
+    """Yield dogs one at a time across pages, skipping (and then recording) ids in `seen`."""
+    for dogs in iter_dog_pages(location=location, limit=limit, start_page=start_page, filters=filters):
+        if seen is None:
+            yield from dogs
+            continue
+        for dog in seen.unseen(dogs):
+            seen.add(dog["id"])
+            yield dog
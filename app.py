@@ -1,6 +1,31 @@
 # app.py
+import os
+import time
+import uuid
 import streamlit as st
-from api_service import get_token, fetch_dogs
+import metrics
+from api_service import get_token, fetch_page, DEFAULT_LOCATION, PAGE_SIZE, READ_ONLY, PetfinderError, RateLimitError
+from deck import DeckLoader
+from dog_store import dog_store
+from exporters import export_file, iter_jsonl, iter_markdown
+from fanout import LOCATIONS, fanout_page, parse_locations
+from filters import CHOICE_FILTERS, FLAG_FILTERS, LABELS, catalog_filters, describe, filter_page, split_local
+from picks_log import PicksLog
+from image_cache import image_cache, PREFETCH_COUNT
+from recommender import Recommender, tags_from_text
+from seen_set import SeenSet
+from summaries import card_fields
+from swipe_component import swipe_queue, PRELOAD_COUNT
+
+# Serve decks from the local SQLite catalog (kept fresh by catalog_db.sync) instead of live API pages
+USE_LOCAL_CATALOG = os.getenv("PETLIGHTS_LOCAL_CATALOG", "0") == "1"
+# Pages to try on first load before giving up on finding unseen dogs
+INITIAL_PAGE_ATTEMPTS = 5
+# Multi-choice search filters offered in the sidebar (see filters.py)
+SIDEBAR_FILTERS = ("age", "size", "gender")
+
+_rerun_started = time.perf_counter()
+metrics.start_http_server()
 
 st.set_page_config(page_title="PetLights AI", page_icon="🐶", layout="wide")
 
@@ -65,9 +90,79 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Sample data for demo mode when the API is rate limited
+SAMPLE_DOGS = [
+    {
+        "id": "sample1",
+        "name": "Buddy",
+        "breed": "Golden Retriever Mix",
+        "age": "Young",
+        "gender": "Male",
+        "size": "Large",
+        "photo": "https://images.unsplash.com/photo-1633722715463-d30f4f325e24?w=500",
+        "description": "Meet Buddy! This lovable golden boy is full of energy and ready to be your best friend. He loves long walks, playing fetch, and belly rubs!",
+        "url": "https://www.petfinder.com"
+    },
+    {
+        "id": "sample2",
+        "name": "Luna",
+        "breed": "Husky Mix",
+        "age": "Adult",
+        "gender": "Female",
+        "size": "Medium",
+        "photo": "https://images.unsplash.com/photo-1568572933382-74d440642117?w=500",
+        "description": "Luna is a beautiful husky mix with striking blue eyes. She's adventurous, loyal, and would love a home with a big yard to explore!",
+        "url": "https://www.petfinder.com"
+    },
+    {
+        "id": "sample3",
+        "name": "Max",
+        "breed": "Labrador Retriever",
+        "age": "Senior",
+        "gender": "Male",
+        "size": "Large",
+        "photo": "https://images.unsplash.com/photo-1527526029430-319f10814151?w=500",
+        "description": "Max is a gentle senior lab looking for a quiet home to spend his golden years. He's calm, well-trained, and loves to cuddle on the couch.",
+        "url": "https://www.petfinder.com"
+    }
+]
+
+def split_filters(filters):
+    """The `(applied, ignored)` parts of `filters` for the configured deck source."""
+    if USE_LOCAL_CATALOG or READ_ONLY:
+        # Saved listings are unfiltered; only what a normalized dog records can be checked
+        return split_local(filters)
+    return filters, {}
+
+def make_deck_loader(filters):
+    """A deck loader for the configured source, narrowed by the user's `filters`."""
+    local = None
+    if USE_LOCAL_CATALOG or READ_ONLY:
+        # ingest_worker.py only saves unfiltered listings, so narrow them here instead
+        local, _ = split_filters(filters)
+        filters = None
+
+    if USE_LOCAL_CATALOG:
+        from catalog_db import AnimalCatalog
+        local_catalog = AnimalCatalog()
+        supported = catalog_filters(local)
+        load_page = lambda page: local_catalog.load_page(page, status="adoptable", **supported)
+    elif len(parse_locations(LOCATIONS)) > 1:
+        # Search every configured ZIP at once, nearest dogs first
+        locations = parse_locations(LOCATIONS)
+        load_page = lambda page: fanout_page(None if READ_ONLY else get_token(), locations, page=page, filters=filters)
+    else:
+        # Read-only workers never need a token: ingest_worker.py fills the cache
+        load_page = lambda page: fetch_page(None if READ_ONLY else get_token(), location=DEFAULT_LOCATION,
+                                            limit=PAGE_SIZE, page=page, filters=filters)
+    if local:
+        return DeckLoader(lambda page: filter_page(load_page(page), local))
+    return DeckLoader(load_page)
+
 # --- Session state setup ---
-if "dogs" not in st.session_state:
-    st.session_state.dogs = []
+if "deck" not in st.session_state:
+    # Ordered animal ids only; the records themselves are shared through dog_store
+    st.session_state.deck = []
 if "index" not in st.session_state:
     st.session_state.index = 0
 if "rankings" not in st.session_state:
@@ -76,68 +171,98 @@ if "show_breed_info" not in st.session_state:
     st.session_state.show_breed_info = False
 if "show_description" not in st.session_state:
     st.session_state.show_description = False
+if "filters" not in st.session_state:
+    st.session_state.filters = {}
+if "deck_loader" not in st.session_state:
+    st.session_state.deck_loader = make_deck_loader(st.session_state.filters)
+
+if "buckets" not in st.session_state:
+    st.session_state.buckets = {"yes": {}, "maybe": {}, "no": {}}
+if "recommender" not in st.session_state:
+    st.session_state.recommender = Recommender()
+if "furthest" not in st.session_state:
+    st.session_state.furthest = 0
+if "last_batch_id" not in st.session_state:
+    st.session_state.last_batch_id = 0
+if "seen" not in st.session_state:
+    st.session_state.seen = SeenSet()
+if "picks_log" not in st.session_state:
+    # The ?user= id in the URL lets a returning user pick up their saved picks
+    if "user" not in st.query_params:
+        st.query_params["user"] = uuid.uuid4().hex
+    st.session_state.picks_log = PicksLog(st.query_params["user"])
+    for record in st.session_state.picks_log.load().values():
+        st.session_state.rankings[record["id"]] = record["choice"]
+        st.session_state.buckets[record["choice"]][record["id"]] = record["name"]
+        st.session_state.seen.add(record["id"])
+
+def add_dogs(dogs):
+    """Append dogs the user hasn't seen yet to the deck and the recommender."""
+    dogs = dog_store.put_many(st.session_state.seen.unseen(dogs))
+    st.session_state.seen.update(dog["id"] for dog in dogs)
+    st.session_state.deck.extend(dog["id"] for dog in dogs)
+    st.session_state.recommender.add(dogs)
+
+def current_dog():
+    """The record under the cursor, or None if it was evicted from the shared store."""
+    return dog_store.get(st.session_state.deck[st.session_state.index])
+
+def rerank_remaining():
+    """Reorder the cards the user hasn't reached yet, best match first."""
+    start = max(st.session_state.index, st.session_state.furthest) + 1
+    remaining = dog_store.resolve(st.session_state.deck[start:])
+    st.session_state.deck[start:] = [dog["id"] for dog in st.session_state.recommender.rerank(remaining)]
 
 # --- Load dogs ---
-if not st.session_state.dogs:
+if not st.session_state.deck:
     with st.spinner("Loading adorable dogs..."):
         try:
-            token = get_token()
-            if token:
-                st.session_state.dogs = fetch_dogs(token, location="85004", limit=10)
-        except Exception as e:
-            error_msg = str(e)
-            if "429" in error_msg or "Rate Limit" in error_msg:
+            # A returning user may have seen every dog on the first few pages
+            for _ in range(INITIAL_PAGE_ATTEMPTS):
+                add_dogs(st.session_state.deck_loader.load_next())
+                if st.session_state.deck or st.session_state.deck_loader.exhausted:
+                    break
+        except PetfinderError as e:
+            if isinstance(e, RateLimitError):
                 st.error("⏰ **API Rate Limit Reached!**\n\nThe Petfinder API has a rate limit. Please try again in a few minutes, or click below to load sample data.")
-                if st.button("Load Sample Dogs (Demo Mode)"):
-                    # Load sample data for testing
-                    st.session_state.dogs = [
-                        {
-                            "id": "sample1",
-                            "name": "Buddy",
-                            "breed": "Golden Retriever Mix",
-                            "age": "Young",
-                            "gender": "Male",
-                            "size": "Large",
-                            "photo": "https://images.unsplash.com/photo-1633722715463-d30f4f325e24?w=500",
-                            "description": "Meet Buddy! This lovable golden boy is full of energy and ready to be your best friend. He loves long walks, playing fetch, and belly rubs!",
-                            "url": "https://www.petfinder.com"
-                        },
-                        {
-                            "id": "sample2",
-                            "name": "Luna",
-                            "breed": "Husky Mix",
-                            "age": "Adult",
-                            "gender": "Female",
-                            "size": "Medium",
-                            "photo": "https://images.unsplash.com/photo-1568572933382-74d440642117?w=500",
-                            "description": "Luna is a beautiful husky mix with striking blue eyes. She's adventurous, loyal, and would love a home with a big yard to explore!",
-                            "url": "https://www.petfinder.com"
-                        },
-                        {
-                            "id": "sample3",
-                            "name": "Max",
-                            "breed": "Labrador Retriever",
-                            "age": "Senior",
-                            "gender": "Male",
-                            "size": "Large",
-                            "photo": "https://images.unsplash.com/photo-1527526029430-319f10814151?w=500",
-                            "description": "Max is a gentle senior lab looking for a quiet home to spend his golden years. He's calm, well-trained, and loves to cuddle on the couch.",
-                            "url": "https://www.petfinder.com"
-                        }
-                    ]
-                    st.rerun()
+                st.button("Load Sample Dogs (Demo Mode)", on_click=add_dogs, args=(SAMPLE_DOGS,))
             else:
-                st.error(f"Error loading dogs: {error_msg}")
+                st.error(f"Error loading dogs: {e}")
             st.stop()
 
 # --- Functions ---
-def rank_dog(choice):
-    dog = st.session_state.dogs[st.session_state.index]
+def top_up_deck(wait=False):
+    """Append any page the background loader has finished and keep it fetching ahead."""
+    loader = st.session_state.deck_loader
+    if wait and loader.pending():
+        # User reached the last card before the next page landed
+        add_dogs(loader.wait(timeout=5))
+    add_dogs(loader.collect())
+    loader.maybe_prefetch(len(st.session_state.deck) - st.session_state.index - 1)
+
+def record_ranking(dog, choice):
+    """Store a decision and keep the buckets and recommender in step."""
+    previous = st.session_state.rankings.get(dog["id"])
+    if previous is not None:
+        # Re-ranked: move the dog out of its old bucket
+        st.session_state.buckets[previous].pop(dog["id"], None)
     st.session_state.rankings[dog["id"]] = choice
-    if st.session_state.index < len(st.session_state.dogs) - 1:
-        st.session_state.index += 1
-        st.session_state.show_breed_info = False
-        st.session_state.show_description = False
+    st.session_state.buckets[choice][dog["id"]] = dog["name"]
+    st.session_state.recommender.record(dog, choice, previous)
+    st.session_state.picks_log.append(dog, choice)
+
+def rank_dog(choice):
+    dog = current_dog()
+    if dog is not None:
+        record_ranking(dog, choice)
+    if st.session_state.index == len(st.session_state.deck) - 1:
+        top_up_deck(wait=True)
+    rerank_remaining()
+    next_dog()
+
+def update_preferences():
+    st.session_state.recommender.set_tags(tags_from_text(st.session_state.preferences))
+    rerank_remaining()
 
 def prev_dog():
     if st.session_state.index > 0:
@@ -146,44 +271,160 @@ def prev_dog():
         st.session_state.show_description = False
 
 def next_dog():
-    if st.session_state.index < len(st.session_state.dogs) - 1:
+    if st.session_state.index == len(st.session_state.deck) - 1:
+        top_up_deck(wait=True)
+    if st.session_state.index < len(st.session_state.deck) - 1:
         st.session_state.index += 1
+        st.session_state.furthest = max(st.session_state.furthest, st.session_state.index)
         st.session_state.show_breed_info = False
         st.session_state.show_description = False
 
+def apply_swipe_batch():
+    """Apply a batch of decisions synced from the fast swipe component."""
+    batch = st.session_state.swipe_queue
+    if not batch or batch["batch_id"] <= st.session_state.last_batch_id:
+        return
+    st.session_state.last_batch_id = batch["batch_id"]
+    for decision in batch["decisions"]:
+        dog = dog_store.get(decision["id"])
+        if dog is not None and decision["choice"] in st.session_state.buckets:
+            record_ranking(dog, decision["choice"])
+
+    # Skip the cursor past everything the browser already ranked
+    deck = st.session_state.deck
+    while st.session_state.index < len(deck) - 1 and deck[st.session_state.index] in st.session_state.rankings:
+        st.session_state.index += 1
+    st.session_state.furthest = max(st.session_state.furthest, st.session_state.index)
+    # The browser has run out of cards: wait for the next page, as rank_dog does
+    out_of_cards = all(animal_id in st.session_state.rankings for animal_id in deck[st.session_state.index:])
+    top_up_deck(wait=out_of_cards)
+    rerank_remaining()
+
+def export_picks(fmt):
+    """Build a download callback that streams the picks to a file on click."""
+    picks_log = st.session_state.picks_log
+
+    def build():
+        with picks_log.view() as picks:
+            if fmt == "jsonl":
+                path = export_file(iter_jsonl(picks, dog_store), picks_log.user_id, "jsonl")
+            else:
+                path = export_file(iter_markdown(picks, dog_store), picks_log.user_id, "md")
+        # Streamlit reads the file itself; the handle closes once it is dropped
+        return open(path, "rb")
+    return build
+
+def apply_filters():
+    """Rebuild the deck from scratch whenever a search filter changes."""
+    names = SIDEBAR_FILTERS + FLAG_FILTERS
+    st.session_state.filters = {name: st.session_state[f"filter_{name}"] for name in names if st.session_state[f"filter_{name}"]}
+    st.session_state.deck = []
+    st.session_state.index = 0
+    st.session_state.furthest = 0
+    st.session_state.show_breed_info = False
+    st.session_state.show_description = False
+    # Forget skipped-over cards so they can come back under the new filters; keep ranked ones out
+    st.session_state.seen = SeenSet()
+    st.session_state.seen.update(st.session_state.rankings)
+    st.session_state.deck_loader = make_deck_loader(st.session_state.filters)
+
+def toggle_breed_info():
+    st.session_state.show_breed_info = not st.session_state.show_breed_info
+
+def toggle_description():
+    st.session_state.show_description = not st.session_state.show_description
+
+top_up_deck()
+
 # --- Main Title ---
 st.markdown('<div class="main-title">Pet Lights AI</div>', unsafe_allow_html=True)
 
+if st.session_state.deck_loader.stale:
+    st.caption("🕒 Showing recently saved listings while we refresh from Petfinder.")
+
+@st.fragment
+def render_info_panel(dog):
+    """Dog details. Reruns on its own when the breed or description toggles are clicked."""
+    dog_id = dog["id"]
+    card = card_fields(dog)
+
+    # Dog name
+    st.markdown(f'<div class="dog-name">{dog["name"]}</div>', unsafe_allow_html=True)
+    st.caption(card["summary"])
+
+    # Dog info
+    st.markdown(f'<span class="info-label">Animal:</span> <span class="info-value">Dog</span>', unsafe_allow_html=True)
+    st.markdown(f'<span class="info-label">Age:</span> <span class="info-value">{dog["age"]}</span>', unsafe_allow_html=True)
+    st.markdown(f'<span class="info-label">Gender:</span> <span class="info-value">{dog["gender"]}</span>', unsafe_allow_html=True)
+
+    # Breed with expander
+    st.button(f"🔽 Breed: {card['breed_display']}", key=f"breed_{dog_id}", use_container_width=True, on_click=toggle_breed_info)
+
+    if st.session_state.show_breed_info:
+        st.info(f"**Full Breed Info:**\n\n{dog['breed']}\n\n*Click button again to close*")
+
+    st.markdown(f'<span class="info-label">Size:</span> <span class="info-value">{dog.get("size", "Unknown")}</span>', unsafe_allow_html=True)
+    st.markdown(f'<span class="info-label">Status:</span> <span class="info-value">ADOPTABLE</span>', unsafe_allow_html=True)
+
+    # Description with expander
+    st.markdown(f'<span class="info-label">Description:</span>', unsafe_allow_html=True)
+    st.write(card["description_preview"])
+
+    st.button("📖 Click for full description", key=f"desc_{dog_id}", use_container_width=True, on_click=toggle_description)
+
+    if st.session_state.show_description:
+        with st.expander("Full Description", expanded=True):
+            st.write(card["description"])
+
+    # Link to Petfinder
+    st.markdown(f"[View full profile on Petfinder →]({dog['url']})")
+
 # --- Display current dog ---
-if st.session_state.dogs:
-    dog = st.session_state.dogs[st.session_state.index]
+applied_filters, ignored_filters = split_filters(st.session_state.filters)
+fast_mode = st.sidebar.toggle("⚡ Fast swipe mode (Y / M / N keys)", key="fast_mode")
+
+# Listings evicted from the shared store drop out of the deck
+while st.session_state.deck and current_dog() is None:
+    st.session_state.deck.pop(st.session_state.index)
+    st.session_state.index = max(0, min(st.session_state.index, len(st.session_state.deck) - 1))
+
+if st.session_state.deck and fast_mode:
+    # The browser holds the next few unranked cards and syncs decisions in batches
+    upcoming = dog_store.resolve([
+        animal_id for animal_id in st.session_state.deck[st.session_state.index:]
+        if animal_id not in st.session_state.rankings
+    ][:PRELOAD_COUNT])
+    swipe_queue(upcoming, last_batch_id=st.session_state.last_batch_id, on_change=apply_swipe_batch)
+
+elif st.session_state.deck:
+    dog = current_dog()
     dog_id = dog["id"]
-    
+
     # Create three-column layout (left: image+nav, middle: buttons, right: info)
     col_left, col_middle, col_right = st.columns([2, 1, 2], gap="medium")
-    
+
     with col_left:
         # Navigation arrows and image
         nav_col1, nav_col2, nav_col3 = st.columns([1, 8, 1])
         with nav_col1:
             st.markdown('<div style="padding-top: 200px;">', unsafe_allow_html=True)
-            if st.button("⬅️", key="prev", disabled=st.session_state.index == 0):
-                prev_dog()
-                st.rerun()
+            st.button("⬅️", key="prev", disabled=st.session_state.index == 0, on_click=prev_dog)
             st.markdown('</div>', unsafe_allow_html=True)
         
         with nav_col2:
-            st.image(dog["photo"], use_container_width=True)
+            st.image(image_cache.image_for(dog["photo"]), use_container_width=True)
         
         with nav_col3:
             st.markdown('<div style="padding-top: 200px;">', unsafe_allow_html=True)
-            if st.button("➡️", key="next", disabled=st.session_state.index >= len(st.session_state.dogs) - 1):
-                next_dog()
-                st.rerun()
+            st.button("➡️", key="next", disabled=st.session_state.index >= len(st.session_state.deck) - 1, on_click=next_dog)
             st.markdown('</div>', unsafe_allow_html=True)
         
-        st.markdown(f"<center>Dog {st.session_state.index + 1} of {len(st.session_state.dogs)}</center>", unsafe_allow_html=True)
-    
+        st.markdown(f"<center>Dog {st.session_state.index + 1} of {len(st.session_state.deck)}</center>", unsafe_allow_html=True)
+        
+        # Warm the photo cache for the next few cards
+        upcoming = dog_store.resolve(st.session_state.deck[st.session_state.index + 1:st.session_state.index + 1 + PREFETCH_COUNT])
+        image_cache.prefetch([d["photo"] for d in upcoming])
+
     with col_middle:
         # Vertically stacked circular buttons in the middle
         st.markdown("<div style='padding-top: 150px;'>", unsafe_allow_html=True)
@@ -192,100 +433,70 @@ if st.session_state.dogs:
         st.markdown("""
             <div style='text-align: center; margin-bottom: 20px;'>
         """, unsafe_allow_html=True)
-        if st.button("✓\nYes", key=f"yes_{dog_id}", use_container_width=True, type="primary"):
-            rank_dog("yes")
-            st.rerun()
+        st.button("✓\nYes", key=f"yes_{dog_id}", use_container_width=True, type="primary", on_click=rank_dog, args=("yes",))
         st.markdown("</div>", unsafe_allow_html=True)
         
         # Maybe button
         st.markdown("""
             <div style='text-align: center; margin-bottom: 20px;'>
         """, unsafe_allow_html=True)
-        if st.button("?\nMaybe", key=f"maybe_{dog_id}", use_container_width=True, type="secondary"):
-            rank_dog("maybe")
-            st.rerun()
+        st.button("?\nMaybe", key=f"maybe_{dog_id}", use_container_width=True, type="secondary", on_click=rank_dog, args=("maybe",))
         st.markdown("</div>", unsafe_allow_html=True)
         
         # No button
         st.markdown("""
             <div style='text-align: center; margin-bottom: 20px;'>
         """, unsafe_allow_html=True)
-        if st.button("✗\nNo", key=f"no_{dog_id}", use_container_width=True, type="secondary"):
-            rank_dog("no")
-            st.rerun()
+        st.button("✗\nNo", key=f"no_{dog_id}", use_container_width=True, type="secondary", on_click=rank_dog, args=("no",))
         st.markdown("</div>", unsafe_allow_html=True)
         st.markdown("</div>", unsafe_allow_html=True)
-    
+
     with col_right:
-        # Dog name
-        st.markdown(f'<div class="dog-name">{dog["name"]}</div>', unsafe_allow_html=True)
-        
-        # Dog info
-        st.markdown(f'<span class="info-label">Animal:</span> <span class="info-value">Dog</span>', unsafe_allow_html=True)
-        st.markdown(f'<span class="info-label">Age:</span> <span class="info-value">{dog["age"]}</span>', unsafe_allow_html=True)
-        st.markdown(f'<span class="info-label">Gender:</span> <span class="info-value">{dog["gender"]}</span>', unsafe_allow_html=True)
-        
-        # Breed with expander
-        breed_display = dog["breed"] if len(dog["breed"]) < 50 else dog["breed"][:47] + "..."
-        if st.button(f"🔽 Breed: {breed_display}", key=f"breed_{dog_id}", use_container_width=True):
-            st.session_state.show_breed_info = not st.session_state.show_breed_info
-            st.rerun()
-        
-        if st.session_state.show_breed_info:
-            st.info(f"**Full Breed Info:**\n\n{dog['breed']}\n\n*Click button again to close*")
-        
-        st.markdown(f'<span class="info-label">Size:</span> <span class="info-value">{dog.get("size", "Unknown")}</span>', unsafe_allow_html=True)
-        st.markdown(f'<span class="info-label">Status:</span> <span class="info-value">ADOPTABLE</span>', unsafe_allow_html=True)
-        
-        # Description with expander
-        description_preview = dog["description"][:100] + "..." if len(dog["description"]) > 100 else dog["description"]
-        st.markdown(f'<span class="info-label">Description:</span>', unsafe_allow_html=True)
-        st.write(description_preview)
-        
-        if st.button("📖 Click for full description", key=f"desc_{dog_id}", use_container_width=True):
-            st.session_state.show_description = not st.session_state.show_description
-            st.rerun()
-        
-        if st.session_state.show_description:
-            with st.expander("Full Description", expanded=True):
-                st.write(dog["description"])
-        
-        # Link to Petfinder
-        st.markdown(f"[View full profile on Petfinder →]({dog['url']})")
+        render_info_panel(dog)
 
+elif applied_filters:
+    st.warning(f"No dogs match your filters ({describe(applied_filters)}). Try loosening them.")
 else:
     st.warning("No dogs found. Try refreshing or check your API credentials.")
 
+# --- Sidebar: Preferences ---
+st.sidebar.text_input(
+    "🏷️ What are you looking for?",
+    key="preferences",
+    placeholder="e.g. small, young, terrier, calm",
+    on_change=update_preferences,
+)
+
+# --- Sidebar: Search filters ---
+with st.sidebar.expander("🔎 Filters", expanded=bool(st.session_state.filters)):
+    for name in SIDEBAR_FILTERS:
+        st.multiselect(LABELS[name], CHOICE_FILTERS[name], key=f"filter_{name}",
+                       format_func=lambda value: "Extra large" if value == "xlarge" else value.capitalize(),
+                       on_change=apply_filters)
+    for name in FLAG_FILTERS:
+        st.checkbox(LABELS[name], key=f"filter_{name}", on_change=apply_filters)
+if applied_filters:
+    st.sidebar.caption(f"Showing: {describe(applied_filters)}")
+if ignored_filters:
+    st.sidebar.caption(f"Not available for saved listings, ignored: {describe(ignored_filters)}")
+
 # --- Sidebar: Saved rankings ---
 st.sidebar.header("📋 Your Choices")
 if st.session_state.rankings:
-    yes_dogs = []
-    maybe_dogs = []
-    no_dogs = []
-    
-    for dog_id, choice in st.session_state.rankings.items():
-        dog = next((d for d in st.session_state.dogs if d["id"] == dog_id), None)
-        if dog:
-            if choice == "yes":
-                yes_dogs.append(dog["name"])
-            elif choice == "maybe":
-                maybe_dogs.append(dog["name"])
-            else:
-                no_dogs.append(dog["name"])
-    
-    if yes_dogs:
-        st.sidebar.markdown("**🟢 Yes:**")
-        for name in yes_dogs:
-            st.sidebar.write(f"  • {name}")
-    
-    if maybe_dogs:
-        st.sidebar.markdown("**🟡 Maybe:**")
-        for name in maybe_dogs:
-            st.sidebar.write(f"  • {name}")
-    
-    if no_dogs:
-        st.sidebar.markdown("**🔴 No:**")
-        for name in no_dogs:
-            st.sidebar.write(f"  • {name}")
+    for choice, label in (("yes", "**🟢 Yes:**"), ("maybe", "**🟡 Maybe:**"), ("no", "**🔴 No:**")):
+        names = st.session_state.buckets[choice]
+        if names:
+            st.sidebar.markdown(label)
+            for name in names.values():
+                st.sidebar.write(f"  • {name}")
 else:
     st.sidebar.write("No choices yet. Start swiping!")
+
+if st.session_state.rankings:
+    # Exports are rendered on click, off the script thread
+    st.sidebar.download_button("📄 Download report (Markdown)", data=export_picks("markdown"),
+                               file_name="my-picks.md", mime="text/markdown")
+    st.sidebar.download_button("🧾 Download picks (JSON Lines)", data=export_picks("jsonl"),
+                               file_name="my-picks.jsonl", mime="application/x-ndjson")
+
+metrics.observe("petlights_rerun_seconds", time.perf_counter() - _rerun_started)
@@ -0,0 +1,214 @@
+# benchmarks/load_test.py
+"""Drive many simulated sessions through app.py against the stub API.
+
+AppTest keeps process-wide runtime state, so two sessions cannot run in one
+process at the same time. Each concurrent session therefore gets its own
+worker process (like running several Streamlit workers on one box); workers
+share the on-disk token store, query cache and photo cache. Run from the
+repository root:
+
+    python -m benchmarks.load_test --sessions 20 --concurrency 4 --actions 30
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import tempfile
+import time
+
+from benchmarks.run_benchmarks import APP_PATH, configure_environment, summarize
+from benchmarks.stub_server import StubPetfinder
+
+# Relative weights of what a simulated user does next
+ACTIONS = (
+    ("swipe", 0.70),
+    ("toggle", 0.15),
+    ("back", 0.10),
+    ("next", 0.05),
+)
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def current_rss_mb():
+    """Resident set size of this process in MiB (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        if resource is None:
+            return None
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if platform.system() == "Darwin" else peak / 1024
+
+
+def api_call_counts():
+    """Outbound Petfinder calls so far in this process, by endpoint, from the metrics registry."""
+    import metrics
+
+    counts = {}
+    for hist in metrics.registry.snapshot()["histograms"]:
+        if hist["name"] == "petlights_http_request_seconds":
+            endpoint = hist["labels"].get("endpoint", "")
+            counts[endpoint] = counts.get(endpoint, 0) + hist["count"]
+    return counts
+
+
+def pick_button(at, action, rng):
+    """The button a user doing `action` would press, or None if it isn't on screen."""
+    keys = [b.key for b in at.button if b.key]
+    if action == "swipe":
+        prefix = rng.choice(("yes_", "yes_", "maybe_", "no_"))
+    elif action == "toggle":
+        prefix = rng.choice(("breed_", "desc_"))
+    elif action == "back":
+        prefix = "prev"
+    else:
+        prefix = "next"
+    for key in keys:
+        if key.startswith(prefix):
+            return at.button(key=key)
+    return None
+
+
+def run_session(session_id, actions, think, rng):
+    """One simulated user: load the app, then perform `actions` interactions."""
+    from streamlit.testing.v1 import AppTest
+
+    weights = [w for _, w in ACTIONS]
+    names = [name for name, _ in ACTIONS]
+    latencies = {name: [] for name in names}
+    calls_before = api_call_counts()
+    cpu_before = time.process_time()
+
+    at = AppTest.from_file(APP_PATH, default_timeout=60)
+    at.query_params["user"] = f"load-{session_id}"
+    start = time.perf_counter()
+    at.run()
+    first_run = time.perf_counter() - start
+    errors = len(at.exception)
+
+    for _ in range(actions):
+        action = rng.choices(names, weights)[0]
+        button = pick_button(at, action, rng)
+        if button is None:
+            continue
+        button.click()
+        start = time.perf_counter()
+        at.run()
+        latencies[action].append(time.perf_counter() - start)
+        errors += len(at.exception)
+        if think:
+            time.sleep(rng.uniform(0, 2 * think))
+
+    calls_after = api_call_counts()
+    return {
+        "first_run": first_run,
+        "latencies": latencies,
+        "cpu_seconds": time.process_time() - cpu_before,
+        "api_calls": {
+            endpoint: calls_after[endpoint] - calls_before.get(endpoint, 0)
+            for endpoint in calls_after
+            if calls_after[endpoint] != calls_before.get(endpoint, 0)
+        },
+        "rankings": len(at.session_state["rankings"]),
+        "errors": errors,
+    }
+
+
+def run_worker(base_url, workdir, session_ids, actions, think, seed):
+    """Entry point of one worker process: run its sessions back to back."""
+    configure_environment(base_url, workdir)
+    # Import the heavy modules first so RSS growth reflects sessions, not imports
+    import api_service
+    from streamlit.testing.v1 import AppTest
+    rss_before = current_rss_mb()
+    sessions = [
+        run_session(session_id, actions, think, random.Random(seed + session_id))
+        for session_id in session_ids
+    ]
+    return {"sessions": sessions, "rss_before_mb": rss_before, "rss_after_mb": current_rss_mb()}
+
+
+def build_report(workers, elapsed, args, stub_counts):
+    sessions = [s for worker in workers for s in worker["sessions"]]
+    all_latencies = [x for s in sessions for samples in s["latencies"].values() for x in samples]
+    by_action = {
+        name: summarize([x for s in sessions for x in s["latencies"][name]])
+        for name, _ in ACTIONS
+    }
+    endpoints = sorted({endpoint for s in sessions for endpoint in s["api_calls"]})
+    rss_growth = [
+        (w["rss_after_mb"] - w["rss_before_mb"]) / max(1, len(w["sessions"]))
+        for w in workers if w["rss_before_mb"] is not None and w["rss_after_mb"] is not None
+    ]
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": vars(args),
+        "elapsed_seconds": round(elapsed, 3),
+        "interactions_per_second": round(len(all_latencies) / elapsed, 2) if elapsed else None,
+        "errors": sum(s["errors"] for s in sessions),
+        "interaction_latency": summarize(all_latencies),
+        "interaction_latency_by_action": by_action,
+        "first_run_latency": summarize([s["first_run"] for s in sessions]),
+        "cpu_seconds_per_session": summarize([s["cpu_seconds"] for s in sessions], scale=1, unit="s"),
+        "rss_growth_mb_per_session": summarize(rss_growth, scale=1, unit="mb"),
+        "rss_peak_mb_per_worker": max((w["rss_after_mb"] or 0) for w in workers),
+        "api_calls_per_session": {
+            endpoint: summarize([s["api_calls"].get(endpoint, 0) for s in sessions], scale=1, unit="calls")
+            for endpoint in endpoints
+        },
+        "stub_requests": stub_counts,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test app.py with simulated sessions against a stub API.")
+    parser.add_argument("--sessions", type=int, default=8, help="total simulated users")
+    parser.add_argument("--concurrency", type=int, default=min(4, os.cpu_count() or 1),
+                        help="sessions running at the same time (one worker process each)")
+    parser.add_argument("--actions", type=int, default=20, help="interactions per session")
+    parser.add_argument("--think", type=float, default=0.0, help="mean pause between interactions, seconds")
+    parser.add_argument("--latency", type=float, default=0.02, help="stub response latency in seconds")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="fraction of stub /animals calls answered 429")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output) if args.output else None
+    concurrency = max(1, min(args.concurrency, args.sessions))
+    plan = [list(range(i, args.sessions, concurrency)) for i in range(concurrency)]
+
+    with tempfile.TemporaryDirectory(prefix="petlights-load-") as workdir, \
+            StubPetfinder(latency=args.latency, rate_limit=args.rate_limit, total_count=2000) as stub:
+        # Fresh interpreters, so every worker imports the app modules with the stub settings
+        context = multiprocessing.get_context("spawn")
+        start = time.perf_counter()
+        with context.Pool(concurrency) as pool:
+            workers = pool.starmap(run_worker, [
+                (stub.base_url, workdir, session_ids, args.actions, args.think, args.seed)
+                for session_ids in plan
+            ])
+        elapsed = time.perf_counter() - start
+        report = build_report(workers, elapsed, args, dict(stub.counts))
+
+    payload = json.dumps(report, indent=2)
+    if output:
+        with open(output, "w") as f:
+            f.write(payload + "\n")
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
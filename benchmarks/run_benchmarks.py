@@ -0,0 +1,208 @@
+# benchmarks/run_benchmarks.py
+"""Offline benchmarks for the fetch path and app reruns.
+
+Runs against benchmarks.stub_server, so no Petfinder credentials or network
+are needed. Run from the repository root:
+
+    python -m benchmarks.run_benchmarks --output bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.stub_server import StubPetfinder
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(REPO_ROOT, "app.py")
+
+
+def summarize(samples, scale=1000, unit="ms"):
+    """Distribution stats, by default for latencies in seconds reported in milliseconds."""
+    values = sorted(s * scale for s in samples)
+    if not values:
+        return {"n": 0}
+    return {
+        "n": len(values),
+        f"mean_{unit}": round(statistics.fmean(values), 3),
+        f"p50_{unit}": round(values[len(values) // 2], 3),
+        f"p95_{unit}": round(values[min(len(values) - 1, int(len(values) * 0.95))], 3),
+        f"p99_{unit}": round(values[min(len(values) - 1, int(len(values) * 0.99))], 3),
+        f"min_{unit}": round(values[0], 3),
+        f"max_{unit}": round(values[-1], 3),
+    }
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def configure_environment(base_url, workdir):
+    """Point the app at the stub and keep every cache file inside `workdir`.
+
+    Must run before api_service is imported, since it reads these at import time.
+    """
+    os.environ.update({
+        "PETFINDER_API_BASE": base_url,
+        "PETFINDER_CLIENT_ID": "bench-client",
+        "PETFINDER_CLIENT_SECRET": "bench-secret",
+        "PETFINDER_TOKEN_STORE": os.path.join(workdir, "token_cache.json"),
+        "PETLIGHTS_CACHE_FILE": os.path.join(workdir, "query_cache.json"),
+        "PETLIGHTS_IMAGE_CACHE_DIR": os.path.join(workdir, "image_cache"),
+        "PETLIGHTS_DB": os.path.join(workdir, "petlights.db"),
+    })
+    os.chdir(workdir)
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+
+
+def bench_cold_start(repeat):
+    """Fresh interpreter: import api_service, get a token and fetch the first page."""
+    script = (
+        "import time; t = time.perf_counter(); import api_service; "
+        "api_service.fetch_page(api_service.get_token()); "
+        "print(time.perf_counter() - t)"
+    )
+    samples = []
+    for i in range(repeat):
+        env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+        # A separate cache file per run so every start is genuinely cold
+        env["PETLIGHTS_CACHE_FILE"] = os.path.join(os.getcwd(), f"cold_{i}.json")
+        env["PETFINDER_TOKEN_STORE"] = os.path.join(os.getcwd(), f"cold_token_{i}.json")
+        out = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, text=True, check=True)
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return {"cold_start": summarize(samples)}
+
+
+def bench_token(repeat):
+    import api_service
+    from token_manager import TokenManager
+
+    cold = []
+    for i in range(repeat):
+        manager = TokenManager(api_service._request_token, "bench-client",
+                               store_path=os.path.join(os.getcwd(), f"bench_token_{i}.json"))
+        cold.append(timed(manager.get))
+    warm = [timed(manager.get) for _ in range(repeat)]
+    return {"get_token_cold": summarize(cold), "get_token_cached": summarize(warm)}
+
+
+def bench_fetch(repeat):
+    import api_service
+    from catalog import shared_catalog
+
+    token = api_service.get_token()
+    # Unique locations force a miss in both the in-memory catalog and the disk cache
+    locations = [f"{85000 + i}" for i in range(repeat)]
+    miss = [timed(lambda loc=loc: api_service.fetch_page(token, location=loc)) for loc in locations]
+    memory_hit = [timed(lambda loc=loc: api_service.fetch_page(token, location=loc)) for loc in locations]
+
+    # A fresh QueryCache on the same file has nothing in memory, so each sample
+    # reads and parses the cache file as a newly started worker would
+    from query_cache import QueryCache
+    warm = api_service._query_cache
+    disk_hit = []
+    try:
+        for loc in locations:
+            shared_catalog.clear()
+            api_service._query_cache = QueryCache(path=warm.path, max_entries=warm.max_entries, ttl=warm.ttl,
+                                                  compress=warm.compress, stale_ttl=warm.stale_ttl)
+            disk_hit.append(timed(lambda loc=loc: api_service.fetch_page(token, location=loc)))
+    finally:
+        api_service._query_cache = warm
+
+    return {
+        "fetch_page_miss": summarize(miss),
+        "fetch_page_disk_hit": summarize(disk_hit),
+        "fetch_page_memory_hit": summarize(memory_hit),
+    }
+
+
+def bench_rate_limited(stub, repeat):
+    """With every /animals call answering 429, measure how fast callers are turned away."""
+    import api_service
+    from http_client import PetfinderError, circuit_breaker
+
+    token = api_service.get_token()
+    previous = stub.rate_limit
+    stub.rate_limit = 1.0
+    samples = []
+    try:
+        for i in range(repeat):
+            def call(i=i):
+                try:
+                    api_service.fetch_page(token, location=f"rl-{i}")
+                except PetfinderError:
+                    pass
+            samples.append(timed(call))
+    finally:
+        stub.rate_limit = previous
+        circuit_breaker.record_success()
+    return {"fetch_page_rate_limited": summarize(samples)}
+
+
+def bench_app(swipes):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_PATH, default_timeout=30)
+    first = timed(at.run)
+    reruns = []
+    for _ in range(swipes):
+        buttons = [b for b in at.button if b.key and b.key.startswith("yes_")]
+        if not buttons:
+            break
+        buttons[0].click()
+        reruns.append(timed(at.run))
+    return {"app_first_run": summarize([first]), "app_swipe_rerun": summarize(reruns)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run PetLights benchmarks against a local stub API.")
+    parser.add_argument("--repeat", type=int, default=20, help="samples per micro-benchmark")
+    parser.add_argument("--swipes", type=int, default=20, help="swipes for the app rerun benchmark")
+    parser.add_argument("--latency", type=float, default=0.02, help="stub response latency in seconds")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="fraction of stub /animals calls answered 429")
+    parser.add_argument("--skip-app", action="store_true", help="skip the Streamlit AppTest benchmark")
+    parser.add_argument("--output", help="write JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output) if args.output else None
+    with tempfile.TemporaryDirectory(prefix="petlights-bench-") as workdir, \
+            StubPetfinder(latency=args.latency, rate_limit=args.rate_limit) as stub:
+        configure_environment(stub.base_url, workdir)
+
+        results = {}
+        results.update(bench_cold_start(min(args.repeat, 5)))
+        results.update(bench_token(args.repeat))
+        results.update(bench_fetch(args.repeat))
+        results.update(bench_rate_limited(stub, min(args.repeat, 5)))
+        if not args.skip_app:
+            results.update(bench_app(args.swipes))
+        os.chdir(REPO_ROOT)
+
+        report = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "config": vars(args),
+            "stub_requests": dict(stub.counts),
+            "results": results,
+        }
+
+    payload = json.dumps(report, indent=2)
+    if output:
+        with open(output, "w") as f:
+            f.write(payload + "\n")
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
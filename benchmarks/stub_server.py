@@ -0,0 +1,182 @@
+# benchmarks/stub_server.py
+"""Local stand-in for the Petfinder token and /animals endpoints.
+
+Serves pages built from a recorded fixture, with configurable latency and
+429 injection, and counts every request so callers can see how many
+outbound calls the app made.
+"""
+import argparse
+import copy
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "animals_page.json")
+
+# 1x1 transparent PNG served for every photo URL
+PHOTO = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000100e221bc330000000049454e44ae426082"
+)
+
+
+class StubPetfinder:
+    """Runs the stub server on a background thread.
+
+    `latency` is seconds added to every response, `rate_limit` the fraction
+    of /animals requests answered with a 429, and `total_count` how many
+    animals the fake search result contains in total.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, rate_limit=0.0, total_count=500,
+                 fixture=FIXTURE, seed=0):
+        with open(fixture) as f:
+            self.templates = json.load(f)["animals"]
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.total_count = total_count
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counts = {"token": 0, "animals": 0, "rate_limited": 0, "photos": 0}
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v2"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-petfinder", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset_counts(self):
+        with self._lock:
+            for key in self.counts:
+                self.counts[key] = 0
+
+    def _count(self, key):
+        with self._lock:
+            self.counts[key] += 1
+
+    def _should_rate_limit(self):
+        with self._lock:
+            return self._random.random() < self.rate_limit
+
+    def build_page(self, query):
+        """Build an /animals response for the parsed query string."""
+        limit = min(int(query.get("limit", ["20"])[0]), 100)
+        page = max(int(query.get("page", ["1"])[0]), 1)
+        total_pages = max(1, -(-self.total_count // limit))
+        start = (page - 1) * limit
+        animals = []
+        for offset in range(start, min(start + limit, self.total_count)):
+            animal = copy.deepcopy(self.templates[offset % len(self.templates)])
+            animal["id"] = 80000000 + offset
+            animal["name"] = f"{animal['name']} {offset}"
+            animal["distance"] = round(0.5 + offset * 0.25, 2)
+            photo = f"{self.base_url}/photos/{animal['id']}.png"
+            animal["photos"] = [{"small": photo, "medium": photo, "large": photo, "full": photo}]
+            animals.append(animal)
+        return {
+            "animals": animals,
+            "pagination": {
+                "count_per_page": limit,
+                "total_count": self.total_count,
+                "current_page": page,
+                "total_pages": total_pages,
+                "_links": {},
+            },
+        }
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status, payload, headers=None):
+                self._send(status, json.dumps(payload).encode("utf-8"), "application/json", headers)
+
+            def _send(self, status, body, content_type, headers=None):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                self.rfile.read(length)
+                if stub.latency:
+                    time.sleep(stub.latency)
+                if urlparse(self.path).path != "/v2/oauth2/token":
+                    self._send_json(404, {"title": "Not Found"})
+                    return
+                stub._count("token")
+                self._send_json(200, {"token_type": "Bearer", "expires_in": 3600, "access_token": "stub-token"})
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                if stub.latency:
+                    time.sleep(stub.latency)
+                if parsed.path.startswith("/v2/photos/"):
+                    stub._count("photos")
+                    self._send(200, PHOTO, "image/png")
+                    return
+                if parsed.path != "/v2/animals":
+                    self._send_json(404, {"title": "Not Found"})
+                    return
+                if self.headers.get("Authorization") != "Bearer stub-token":
+                    self._send_json(401, {"title": "Unauthorized"})
+                    return
+                stub._count("animals")
+                if stub._should_rate_limit():
+                    stub._count("rate_limited")
+                    self._send_json(429, {"title": "Too Many Requests"}, {"Retry-After": "1"})
+                    return
+                self._send_json(200, stub.build_page(parse_qs(parsed.query)))
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local stub Petfinder API.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="fraction of /animals calls answered with 429")
+    parser.add_argument("--total-count", type=int, default=500)
+    args = parser.parse_args()
+
+    stub = StubPetfinder(port=args.port, latency=args.latency, rate_limit=args.rate_limit,
+                         total_count=args.total_count)
+    print(f"Stub Petfinder listening on {stub.base_url}")
+    try:
+        stub._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+# catalog.py
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from types import MappingProxyType
+
+import metrics
+from dog_store import dog_store
+from http_client import PetfinderError
+from query_cache import normalize_query
+from rate_budget import BACKGROUND, priority
+
+MAX_RESULTS = 512
+# Short in-memory TTL; the on-disk query cache holds the authoritative expiry
+DEFAULT_TTL = 60
+
+
+_revalidate_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="catalog-revalidate")
+
+
+def freeze_page(result, stale=False):
+    """Wrap a fetched page in read-only views so sessions can share it without copying.
+
+    Dogs become the process-wide immutable records from `dog_store`. Their
+    distance from the searched location depends on the query, so it is kept
+    in the page (`distances`, parallel to `dogs`) rather than on the record.
+    `stale` marks last-good data served while a fresh copy could not be fetched.
+    """
+    return MappingProxyType({
+        "dogs": dog_store.put_many(result["dogs"]),
+        "distances": tuple(dog.get("distance") for dog in result["dogs"]),
+        "pagination": MappingProxyType(dict(result.get("pagination") or {})),
+        "stale": stale,
+    })
+
+
+EMPTY_PAGE = freeze_page({"dogs": [], "pagination": {}})
+
+
+class SharedCatalog:
+    """Process-wide store of read-only query results with single-flight loading.
+
+    Every Streamlit session in the process goes through the same instance, so
+    concurrent requests for one query collapse into a single load and all
+    callers receive the same frozen result object.
+
+    Expired cache entries are served immediately (stale-while-revalidate)
+    while a background refresh runs; if that refresh fails, the last good
+    data keeps being served, marked stale.
+    """
+
+    def __init__(self, max_results=MAX_RESULTS, ttl=DEFAULT_TTL):
+        self.max_results = max_results
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._results = OrderedDict()
+        self._inflight = {}
+        self._revalidating = set()
+
+    def get(self, params, load_fresh, load_cached=None):
+        """Return the result for `params`, loading it at most once per key at a time.
+
+        `load_cached()` returns `(data, is_stale)` or None; `load_fresh()` hits
+        the API and returns data or None. If nothing could be loaded the empty
+        page is returned and nothing is remembered.
+        """
+        key = normalize_query(params)
+        with self._lock:
+            entry = self._results.get(key)
+            if entry is not None and entry[0] > time.time():
+                self._results.move_to_end(key)
+                metrics.inc("petlights_cache_lookups_total", cache="catalog", result="hit")
+                return entry[1]
+
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+
+        if not leader:
+            # Someone else is already fetching this query; share their answer
+            metrics.inc("petlights_cache_lookups_total", cache="catalog", result="coalesced")
+            return future.result()
+
+        metrics.inc("petlights_cache_lookups_total", cache="catalog", result="miss")
+
+        try:
+            cached = load_cached() if load_cached else None
+            if cached is not None:
+                data, is_stale = cached
+                result = freeze_page(data, stale=is_stale)
+                if is_stale:
+                    self._revalidate(key, load_fresh)
+            else:
+                loaded = load_fresh()
+                result = EMPTY_PAGE if loaded is None else freeze_page(loaded)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            if result is not EMPTY_PAGE:
+                self._remember(key, result)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _remember(self, key, result):
+        with self._lock:
+            self._results[key] = (time.time() + self.ttl, result)
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_results:
+                self._results.popitem(last=False)
+
+    def _revalidate(self, key, load_fresh):
+        """Refresh a stale entry in the background, once per key at a time."""
+        with self._lock:
+            if key in self._revalidating:
+                return
+            self._revalidating.add(key)
+
+        def run():
+            try:
+                with priority(BACKGROUND):
+                    loaded = load_fresh()
+                if loaded is not None:
+                    self._remember(key, freeze_page(loaded))
+            except PetfinderError as e:
+                # Keep serving the stale copy; the circuit breaker limits retries
+                print(f"Error refreshing cached dogs: {e}")
+            finally:
+                with self._lock:
+                    self._revalidating.discard(key)
+
+        _revalidate_executor.submit(run)
+
+    def clear(self):
+        """Forget every in-memory result."""
+        with self._lock:
+            self._results.clear()
+
+    def invalidate(self, params):
+        """Forget the in-memory result for `params`."""
+        with self._lock:
+            self._results.pop(normalize_query(params), None)
+
+
+# One catalog per process, shared by every session
+shared_catalog = SharedCatalog()
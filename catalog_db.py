@@ -0,0 +1,309 @@
+# catalog_db.py
+import os
+import sqlite3
+import threading
+import time
+
+from api_service import DEFAULT_LOCATION, PAGE_SIZE, get_token, stream_animals
+from rate_budget import BACKGROUND, priority
+
+DB_PATH = os.getenv("PETLIGHTS_DB", "petlights.db")
+# Petfinder's maximum page size; sync pulls as much as possible per request
+SYNC_PAGE_SIZE = 100
+SYNC_MAX_PAGES = 20
+# Write synced dogs to SQLite in batches of this size while the page is still decoding
+UPSERT_BATCH = 25
+# Incremental syncs only see new listings, so every location is fully re-pulled this
+# often; listings no full sync has seen for LISTING_TTL (adopted, withdrawn) are dropped
+FULL_SYNC_INTERVAL = float(os.getenv("PETLIGHTS_CATALOG_REFRESH_HOURS", "12")) * 3600
+LISTING_TTL = float(os.getenv("PETLIGHTS_CATALOG_TTL_HOURS", "36")) * 3600
+
+COLUMNS = (
+    "id", "name", "breed", "age", "gender", "size", "photo", "description", "url",
+    "status", "location", "postcode", "published_at", "status_changed_at",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS animals (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    breed TEXT,
+    age TEXT,
+    gender TEXT,
+    size TEXT,
+    photo TEXT,
+    description TEXT,
+    url TEXT,
+    status TEXT,
+    location TEXT,
+    postcode TEXT,
+    published_at TEXT,
+    status_changed_at TEXT,
+    synced_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_animals_age ON animals(age);
+CREATE INDEX IF NOT EXISTS idx_animals_size ON animals(size);
+CREATE INDEX IF NOT EXISTS idx_animals_gender ON animals(gender);
+CREATE INDEX IF NOT EXISTS idx_animals_breed ON animals(breed);
+CREATE INDEX IF NOT EXISTS idx_animals_status_published ON animals(status, published_at);
+CREATE INDEX IF NOT EXISTS idx_animals_location ON animals(location);
+CREATE INDEX IF NOT EXISTS idx_animals_postcode ON animals(postcode);
+CREATE INDEX IF NOT EXISTS idx_animals_synced ON animals(synced_at);
+CREATE TABLE IF NOT EXISTS sync_state (
+    location TEXT PRIMARY KEY,
+    last_published_at TEXT,
+    synced_at REAL,
+    full_synced_at REAL,
+    resume_after TEXT,
+    resume_page INTEGER,
+    resume_newest TEXT,
+    resume_full INTEGER
+);
+"""
+
+# Columns callers may filter on, mapped to their SQL expression
+FILTERS = {
+    "age": "age = ?",
+    "size": "size = ?",
+    "gender": "gender = ?",
+    "breed": "breed LIKE ?",
+    "status": "status = ?",
+    "location": "location = ?",
+    "postcode": "postcode = ?",
+}
+
+# sync_state columns added after the first release, for migrating older databases
+SYNC_STATE_ADDED = (
+    ("full_synced_at", "REAL"),
+    ("resume_after", "TEXT"),
+    ("resume_page", "INTEGER"),
+    ("resume_newest", "TEXT"),
+    ("resume_full", "INTEGER"),
+)
+
+
+class AnimalCatalog:
+    """Local SQLite store of normalized animals, indexed for deck and filter queries.
+
+    Each thread gets its own connection; the database runs in WAL mode so the
+    web app can read while a sync writes. Listings not refreshed by a sync
+    within `ttl` seconds are hidden from queries and removed by `prune()`.
+    """
+
+    def __init__(self, path=DB_PATH, ttl=LISTING_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            # Databases created before full syncs and resume points were tracked
+            columns = [row["name"] for row in conn.execute("PRAGMA table_info(sync_state)")]
+            for column, sql_type in SYNC_STATE_ADDED:
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE sync_state ADD COLUMN {column} {sql_type}")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def upsert(self, dogs):
+        """Insert or update normalized dog dicts."""
+        now = time.time()
+        rows = [tuple(dog.get(col) for col in COLUMNS) + (now,) for dog in dogs]
+        placeholders = ", ".join("?" for _ in range(len(COLUMNS) + 1))
+        updates = ", ".join(f"{col} = excluded.{col}" for col in COLUMNS[1:] + ("synced_at",))
+        with self._connect() as conn:
+            conn.executemany(
+                f"INSERT INTO animals ({', '.join(COLUMNS)}, synced_at) VALUES ({placeholders}) "
+                f"ON CONFLICT(id) DO UPDATE SET {updates}",
+                rows,
+            )
+
+    def _where(self, filters):
+        clauses, args = [], []
+        for name, value in filters.items():
+            if value is None:
+                continue
+            if name not in FILTERS:
+                raise ValueError(f"Unknown filter: {name}")
+            clauses.append(FILTERS[name])
+            args.append(f"%{value}%" if name == "breed" else value)
+        if self.ttl:
+            clauses.append("synced_at >= ?")
+            args.append(time.time() - self.ttl)
+        return (f"WHERE {' AND '.join(clauses)}" if clauses else ""), args
+
+    def query(self, limit=PAGE_SIZE, offset=0, **filters):
+        """Return dogs matching `filters` (see FILTERS), newest first.
+
+        `breed` matches as a substring; filters set to None are ignored.
+        """
+        where, args = self._where(filters)
+        sql = (
+            f"SELECT {', '.join(COLUMNS)} FROM animals {where} "
+            "ORDER BY published_at DESC LIMIT ? OFFSET ?"
+        )
+        rows = self._connect().execute(sql, args + [limit, offset]).fetchall()
+        return [dict(row) for row in rows]
+
+    def load_page(self, page, limit=PAGE_SIZE, **filters):
+        """Return a page in the same shape as `api_service.fetch_page`, for DeckLoader."""
+        dogs = self.query(limit=limit, offset=(page - 1) * limit, **filters)
+        return {"dogs": dogs, "pagination": {"current_page": page}}
+
+    def get(self, animal_id):
+        row = self._connect().execute(
+            f"SELECT {', '.join(COLUMNS)} FROM animals WHERE id = ?", (animal_id,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def count(self, **filters):
+        where, args = self._where(filters)
+        return self._connect().execute(f"SELECT COUNT(*) FROM animals {where}", args).fetchone()[0]
+
+    def last_published_at(self, location):
+        row = self._connect().execute(
+            "SELECT last_published_at FROM sync_state WHERE location = ?", (location,)
+        ).fetchone()
+        return row["last_published_at"] if row else None
+
+    def last_full_sync(self, location):
+        row = self._connect().execute(
+            "SELECT full_synced_at FROM sync_state WHERE location = ?", (location,)
+        ).fetchone()
+        return row["full_synced_at"] if row else None
+
+    def sync_progress(self, location):
+        """The resume point of an unfinished sync for `location`, or None."""
+        row = self._connect().execute(
+            "SELECT resume_after, resume_page, resume_newest, resume_full FROM sync_state "
+            "WHERE location = ? AND resume_page IS NOT NULL", (location,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            "after": row["resume_after"],
+            "page": row["resume_page"],
+            "newest": row["resume_newest"],
+            "full": bool(row["resume_full"]),
+        }
+
+    def save_progress(self, location, after, page, newest, full):
+        """Remember where an unfinished sync for `location` should pick up."""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO sync_state (location, resume_after, resume_page, resume_newest, resume_full) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(location) DO UPDATE SET resume_after = excluded.resume_after, "
+                "resume_page = excluded.resume_page, resume_newest = excluded.resume_newest, "
+                "resume_full = excluded.resume_full",
+                (location, after, page, newest, int(full)),
+            )
+
+    def mark_synced(self, location, last_published_at, full=False):
+        """Record a finished sync: move the watermark and clear any resume point."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO sync_state (location, last_published_at, synced_at, full_synced_at) "
+                "VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(location) DO UPDATE SET last_published_at = excluded.last_published_at, "
+                "synced_at = excluded.synced_at, "
+                "full_synced_at = COALESCE(excluded.full_synced_at, full_synced_at), "
+                "resume_after = NULL, resume_page = NULL, resume_newest = NULL, resume_full = NULL",
+                (location, last_published_at, now, now if full else None),
+            )
+
+    def prune(self):
+        """Delete listings no sync has seen within `ttl` seconds. Returns how many were removed."""
+        if not self.ttl:
+            return 0
+        with self._connect() as conn:
+            cursor = conn.execute("DELETE FROM animals WHERE synced_at < ?", (time.time() - self.ttl,))
+        return cursor.rowcount
+
+
+def sync(catalog, location=DEFAULT_LOCATION, max_pages=SYNC_MAX_PAGES, full=False):
+    """Pull animals published since the last sync for `location` into `catalog`.
+
+    Uses Petfinder's `sort=recent` and `after` so only new listings are
+    downloaded. Every FULL_SYNC_INTERVAL (or with `full=True`) the watermark is
+    ignored and every adoptable listing is re-pulled, which keeps them from
+    expiring; listings that have left Petfinder's adoptable results are
+    then pruned.
+
+    Each call fetches at most `max_pages` pages. A sync that needs more saves
+    its resume point (`after`, next page, newest listing seen) and the next
+    call continues from there; the watermark only moves, and a full sync
+    only counts, once the last page has been reached. Returns the number of
+    animals written.
+    """
+    progress = None if full else catalog.sync_progress(location)
+    if progress is not None:
+        after, start_page, newest, full = progress["after"], progress["page"], progress["newest"], progress["full"]
+    else:
+        if not full:
+            last_full = catalog.last_full_sync(location)
+            full = last_full is None or time.time() - last_full >= FULL_SYNC_INTERVAL
+        after = None if full else catalog.last_published_at(location)
+        start_page, newest = 1, after
+    written = 0
+    complete = False
+    next_page = start_page
+    for page in range(start_page, start_page + max_pages):
+        params = {
+            "type": "dog",
+            "location": location,
+            "status": "adoptable",
+            "sort": "recent",
+            "limit": SYNC_PAGE_SIZE,
+            "page": page,
+        }
+        if after:
+            params["after"] = after
+        page_written = 0
+        with priority(BACKGROUND):
+            stream = stream_animals(get_token(), params)
+            if stream is None:
+                break
+            batch = []
+            for dog in stream:
+                batch.append(dog)
+                if dog.get("published_at") and (not newest or dog["published_at"] > newest):
+                    newest = dog["published_at"]
+                if len(batch) >= UPSERT_BATCH:
+                    catalog.upsert(batch)
+                    page_written += len(batch)
+                    batch = []
+            if batch:
+                catalog.upsert(batch)
+                page_written += len(batch)
+        if not page_written:
+            complete = True
+            break
+        written += page_written
+        next_page = page + 1
+
+        total_pages = stream.pagination.get("total_pages")
+        if total_pages is not None and page >= total_pages:
+            complete = True
+            break
+
+    if complete:
+        catalog.mark_synced(location, newest, full=full)
+        if full:
+            pruned = catalog.prune()
+            if pruned:
+                print(f"Pruned {pruned} listings no longer adoptable")
+    else:
+        # Listings past this page are still unfetched; keep the old watermark
+        catalog.save_progress(location, after, next_page, newest, full)
+        print(f"Sync for {location} paused before page {next_page}; it will resume next cycle")
+    print(f"Synced {written} dogs for {location}")
+    return written
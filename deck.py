@@ -0,0 +1,111 @@
+# deck.py
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from http_client import PetfinderError
+from rate_budget import INTERACTIVE, PREFETCH, priority
+
+# Start fetching the next page when the user is this many cards from the end
+PREFETCH_THRESHOLD = 5
+
+# Shared by every session so background page fetches stay bounded
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="deck-prefetch")
+
+
+class DeckLoader:
+    """Loads pages of dogs one at a time on a background thread.
+
+    `load_page(page)` must return a `{"dogs": [...], "pagination": {...}}`
+    mapping like `api_service.fetch_page`. Streamlit reruns call `collect()` to
+    pick up a finished page and `maybe_prefetch()` to start the next one once
+    the user gets close to the end of what is already loaded.
+    """
+
+    def __init__(self, load_page, prefetch_threshold=PREFETCH_THRESHOLD):
+        self._load_page = load_page
+        self._prefetch_threshold = prefetch_threshold
+        self._lock = threading.Lock()
+        self._future = None
+        self._next_page = 1
+        self.exhausted = False
+        self.error = None
+        self.stale = False
+
+    def load_next(self):
+        """Fetch the next page on the calling thread (used for the very first page).
+
+        The user is waiting on this page, so it is never queued on the shared
+        prefetch pool behind other sessions' background top-ups.
+        """
+        if self.exhausted:
+            return []
+        if self._future is not None:
+            # A prefetch for this page is already running; take its result
+            dogs = self.wait()
+            if self.error is not None and not dogs:
+                raise self.error
+            return dogs
+        with priority(INTERACTIVE):
+            result = self._load_page(self._next_page)
+        return self._accept(result)
+
+    def maybe_prefetch(self, remaining, level=PREFETCH):
+        """Start a background fetch if the deck is running low and none is in flight."""
+        with self._lock:
+            if self.exhausted or self._future is not None:
+                return
+            if remaining > self._prefetch_threshold:
+                return
+            self._future = _executor.submit(self._load_at, self._next_page, level)
+
+    def _load_at(self, page, level):
+        with priority(level):
+            return self._load_page(page)
+
+    def pending(self):
+        """True while a page fetch is in flight."""
+        return self._future is not None
+
+    def collect(self):
+        """Return newly fetched dogs if a background fetch has finished, else []."""
+        with self._lock:
+            future = self._future
+            if future is None or not future.done():
+                return []
+            self._future = None
+
+        try:
+            result = future.result()
+        except PetfinderError as e:
+            # Keep what we have; the next maybe_prefetch() retries the same page
+            print(f"Error prefetching dogs: {e}")
+            self.error = e
+            return []
+
+        return self._accept(result)
+
+    def _accept(self, result):
+        """Record a fetched page and return its dogs."""
+        self.error = None
+        self.stale = result.get("stale", False)
+        dogs = list(result["dogs"])
+        total_pages = result["pagination"].get("total_pages")
+        # Locally filtered pages may match nothing without being the last page
+        if not result.get("scanned", len(dogs)) or (total_pages is not None and self._next_page >= total_pages):
+            self.exhausted = True
+        self._next_page += 1
+        return dogs
+
+    def wait(self, timeout=None):
+        """Block until the in-flight fetch finishes and return its dogs."""
+        future = self._future
+        if future is None:
+            return []
+        try:
+            future.result(timeout=timeout)
+        except FutureTimeoutError:
+            return []
+        except PetfinderError:
+            pass
+        return self.collect()
@@ -0,0 +1,133 @@
+# dog_store.py
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+from summaries import summary_cache
+
+FIELDS = (
+    "id", "name", "breed", "age", "gender", "size", "photo", "description", "url",
+    "status", "location", "postcode", "published_at", "status_changed_at",
+    "breed_display", "description_preview", "summary",
+)
+# Low-cardinality values shared by many dogs; interned so each string exists once
+INTERNED_FIELDS = frozenset(("breed", "age", "gender", "size", "status", "location", "postcode", "breed_display"))
+
+MAX_RECORDS = int(os.getenv("PETLIGHTS_DOG_STORE_MAX", "200000"))
+
+
+class DogRecord:
+    """Immutable, slotted copy of a normalized dog.
+
+    Supports the read-only parts of the dict interface (`dog["name"]`,
+    `dog.get("size")`, `"summary" in dog`) so rendering code works unchanged.
+    Per-query values such as `distance` are not kept; pages carry them instead.
+    """
+
+    __slots__ = FIELDS
+
+    def __init__(self, dog):
+        for field in FIELDS:
+            value = dog.get(field)
+            if field in INTERNED_FIELDS and isinstance(value, str):
+                value = sys.intern(value)
+            object.__setattr__(self, field, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("DogRecord is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("DogRecord is immutable")
+
+    def __getitem__(self, key):
+        if key not in FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        value = getattr(self, key, None) if key in FIELDS else None
+        return default if value is None else value
+
+    def __contains__(self, key):
+        return key in FIELDS and getattr(self, key) is not None
+
+    def keys(self):
+        return [field for field in FIELDS if getattr(self, field) is not None]
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.keys()}
+
+    @property
+    def version(self):
+        return self.status_changed_at or self.published_at
+
+    def __repr__(self):
+        return f"DogRecord(id={self.id!r}, name={self.name!r})"
+
+
+class DogStore:
+    """Process-wide records keyed by animal id, shared by every session.
+
+    Sessions keep only ordered id lists and look records up here. A listing
+    is stored again only when its Petfinder version changes; the least
+    recently used records are dropped past `max_records`.
+    """
+
+    def __init__(self, max_records=MAX_RECORDS):
+        self.max_records = max_records
+        self._lock = threading.Lock()
+        self._records = OrderedDict()
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, animal_id):
+        return animal_id in self._records
+
+    def put(self, dog):
+        """Return the canonical record for `dog`, storing it if new or changed."""
+        animal_id = dog["id"]
+        version = dog.get("status_changed_at") or dog.get("published_at")
+        with self._lock:
+            existing = self._records.get(animal_id)
+            if existing is not None and (existing is dog or existing.version == version):
+                self._records.move_to_end(animal_id)
+                return existing
+
+        if isinstance(dog, DogRecord):
+            record = dog
+        else:
+            if "summary" not in dog:
+                dog = dict(dog, **summary_cache.get(dog))
+            record = DogRecord(dog)
+        with self._lock:
+            self._records[animal_id] = record
+            self._records.move_to_end(animal_id)
+            while len(self._records) > self.max_records:
+                self._records.popitem(last=False)
+        return record
+
+    def put_many(self, dogs):
+        return tuple(self.put(dog) for dog in dogs)
+
+    def get(self, animal_id, default=None):
+        with self._lock:
+            record = self._records.get(animal_id)
+            if record is None:
+                return default
+            self._records.move_to_end(animal_id)
+            return record
+
+    def resolve(self, ids):
+        """Records for `ids`, in order, skipping any that were evicted."""
+        records = []
+        for animal_id in ids:
+            record = self.get(animal_id)
+            if record is not None:
+                records.append(record)
+        return records
+
+
+# One store per process
+dog_store = DogStore()
@@ -0,0 +1,82 @@
+# exporters.py
+import json
+import os
+import time
+
+EXPORT_DIR = os.getenv("PETLIGHTS_EXPORT_DIR", "exports")
+# Detail fields pulled from the deck when the dog is still loaded
+DETAIL_FIELDS = ("age", "gender", "size", "location", "status", "description")
+CHOICE_HEADINGS = (("yes", "🟢 Yes"), ("maybe", "🟡 Maybe"), ("no", "🔴 No"))
+# Write this many bytes at a time when streaming to a file
+CHUNK_SIZE = 64 * 1024
+
+
+def join_details(pick, dog_index):
+    """Merge a picks-log record with whatever the deck knows about the dog."""
+    dog = dog_index.get(pick["id"])
+    if dog is None:
+        return pick
+    joined = dict(pick)
+    for field in DETAIL_FIELDS:
+        if dog.get(field) is not None:
+            joined[field] = dog[field]
+    return joined
+
+
+def iter_jsonl(picks, dog_index):
+    """Yield one JSON line per ranked dog."""
+    for pick in picks:
+        yield json.dumps(join_details(pick, dog_index), separators=(",", ":")) + "\n"
+
+
+def iter_markdown(picks, dog_index):
+    """Yield a printable Markdown report, grouped by choice.
+
+    `picks` must be re-iterable (e.g. a PicksView): it is read once to count
+    each choice and once per section, so no more than one pick is held at a time.
+    """
+    yield f"# My Picks\n\n_Exported {time.strftime('%Y-%m-%d %H:%M')}_\n"
+    counts = {}
+    for pick in picks:
+        counts[pick["choice"]] = counts.get(pick["choice"], 0) + 1
+    for choice, heading in CHOICE_HEADINGS:
+        if not counts.get(choice):
+            continue
+        yield f"\n## {heading} ({counts[choice]})\n\n"
+        for pick in picks:
+            if pick["choice"] == choice:
+                yield render_markdown_entry(join_details(pick, dog_index))
+
+
+def render_markdown_entry(pick):
+    """One Markdown bullet for a ranked dog."""
+    details = [pick.get(field) for field in ("breed", "age", "gender", "size", "location")]
+    summary = ", ".join(str(d) for d in details if d)
+    line = f"- **[{pick['name']}]({pick.get('url') or 'https://www.petfinder.com'})**"
+    if summary:
+        line += f" — {summary}"
+    return line + "\n"
+
+
+def write_chunks(chunks, path):
+    """Stream text chunks to `path`, buffering at most CHUNK_SIZE bytes."""
+    tmp_path = path + ".part"
+    buffer = []
+    size = 0
+    with open(tmp_path, "wb") as f:
+        for chunk in chunks:
+            data = chunk.encode("utf-8")
+            buffer.append(data)
+            size += len(data)
+            if size >= CHUNK_SIZE:
+                f.write(b"".join(buffer))
+                buffer, size = [], 0
+        f.write(b"".join(buffer))
+    os.replace(tmp_path, path)
+    return path
+
+
+def export_file(chunks, user_id, extension, directory=EXPORT_DIR):
+    """Write an export under `directory` and return its path."""
+    os.makedirs(directory, exist_ok=True)
+    return write_chunks(chunks, os.path.join(directory, f"{user_id}-picks.{extension}"))
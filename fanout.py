@@ -0,0 +1,110 @@
+# fanout.py
+import heapq
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from api_service import DEFAULT_LOCATION, PAGE_SIZE, PetfinderError, fetch_query
+from filters import to_params
+from rate_budget import current_priority, priority
+
+# Comma-separated ZIP codes the deck searches together
+LOCATIONS = os.getenv("PETLIGHTS_LOCATIONS", DEFAULT_LOCATION)
+MAX_WORKERS = int(os.getenv("PETLIGHTS_FANOUT_WORKERS", "4"))
+
+# Shared by every session so the number of concurrent searches stays bounded
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="fanout")
+
+
+def parse_locations(value):
+    return [loc.strip() for loc in value.split(",") if loc.strip()]
+
+
+def build_queries(locations, types=("dog",), distance=None, limit=PAGE_SIZE, page=1, filters=None):
+    """One /animals query per location and type, nearest animals first."""
+    filter_params = to_params(filters)
+    queries = []
+    for location in locations:
+        for animal_type in types:
+            params = {
+                "type": animal_type,
+                "location": location,
+                "limit": limit,
+                "page": page,
+                "status": "adoptable",
+                "sort": "distance",
+            }
+            if distance is not None:
+                params["distance"] = distance
+            params.update(filter_params)
+            queries.append(params)
+    return queries
+
+
+def _distance_key(distance):
+    return float("inf") if distance is None else distance
+
+
+def fanout_search(token, queries, seen=None):
+    """Run `queries` concurrently and yield `(dog, distance, page)`, nearest first.
+
+    `page` is the query result the dog came from, for its pagination and
+    stale flag.
+
+    Each query is sorted by distance, so the results are a k-way merge of
+    the per-query lists, deduplicated by animal id (and against `seen`, if
+    given). A dog is yielded only once every query still in flight has
+    returned, since until then a closer dog may be waiting in that result.
+    A failing query is logged and skipped unless every query fails.
+    """
+    level = current_priority()
+
+    def run(params):
+        with priority(level):
+            return fetch_query(token, params)
+
+    futures = [_executor.submit(run, params) for params in queries]
+    errors = []
+
+    def ranked(index, future):
+        try:
+            result = future.result()
+        except PetfinderError as e:
+            print(f"Error in fan-out query: {e}")
+            errors.append(e)
+            return
+        distances = result["distances"]
+        # Petfinder already sorts by distance; re-sorting is cheap and puts unknowns last
+        for position in sorted(range(len(distances)), key=lambda i: _distance_key(distances[i])):
+            distance = distances[position]
+            yield _distance_key(distance), index, position, result["dogs"][position], distance, result
+
+    emitted = set()
+    for _, _, _, dog, distance, page in heapq.merge(*(ranked(i, f) for i, f in enumerate(futures))):
+        if dog["id"] in emitted or (seen is not None and dog["id"] in seen):
+            continue
+        emitted.add(dog["id"])
+        yield dog, distance, page
+
+    if errors and len(errors) == len(futures):
+        raise errors[0]
+
+
+def fanout_page(token, locations, page=1, limit=PAGE_SIZE, distance=None, filters=None):
+    """One deck page across `locations`, in the shape `api_service.fetch_page` returns."""
+    queries = build_queries(locations, distance=distance, limit=limit, page=page, filters=filters)
+    dogs = []
+    distances = []
+    total_pages = 0
+    stale = False
+    for dog, dog_distance, result in fanout_search(token, queries):
+        dogs.append(dog)
+        distances.append(dog_distance)
+        total_pages = max(total_pages, result["pagination"].get("total_pages") or 0)
+        # Any last-good location page makes the merged page last-good too
+        stale = stale or result.get("stale", False)
+    return {
+        "dogs": dogs,
+        "distances": tuple(distances),
+        "pagination": {"total_pages": total_pages or None},
+        "stale": stale,
+    }
@@ -0,0 +1,131 @@
+# filters.py
+
+# Petfinder /animals search filters: name -> allowed values (None = free text)
+CHOICE_FILTERS = {
+    "age": ("baby", "young", "adult", "senior"),
+    "size": ("small", "medium", "large", "xlarge"),
+    "gender": ("male", "female"),
+    "coat": ("short", "medium", "long", "wire", "hairless", "curly"),
+}
+# Yes/no attributes; only sent when required, since "false" would hide unknowns
+FLAG_FILTERS = ("good_with_children", "good_with_dogs", "good_with_cats", "house_trained", "special_needs")
+TEXT_FILTERS = ("breed",)
+# Filters a normalized dog records, so they can be checked without asking Petfinder
+LOCAL_FILTERS = ("age", "size", "gender")
+MAX_DISTANCE = 500
+
+# Labels for the sidebar widgets
+LABELS = {
+    "age": "Age",
+    "size": "Size",
+    "gender": "Gender",
+    "coat": "Coat",
+    "good_with_children": "Good with kids",
+    "good_with_dogs": "Good with dogs",
+    "good_with_cats": "Good with cats",
+    "house_trained": "House-trained",
+    "special_needs": "Special needs",
+    "breed": "Breed",
+}
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    return [str(v).strip().lower() for v in value if str(v).strip()]
+
+
+def to_params(filters):
+    """Translate user preferences into Petfinder query parameters.
+
+    `filters` maps filter names to a value or list of values, e.g.
+    `{"age": ["young", "adult"], "good_with_children": True}`. Multi-value
+    filters are sorted and comma-joined so that equivalent selections give
+    identical params, and so share one cache entry. Empty values are
+    dropped; unknown names or values raise ValueError.
+    """
+    params = {}
+    for name, value in (filters or {}).items():
+        if name in CHOICE_FILTERS:
+            values = sorted(set(_as_list(value)))
+            unknown = [v for v in values if v not in CHOICE_FILTERS[name]]
+            if unknown:
+                raise ValueError(f"Unknown {name} value(s): {', '.join(unknown)}")
+            if values and len(values) < len(CHOICE_FILTERS[name]):
+                params[name] = ",".join(values)
+        elif name in FLAG_FILTERS:
+            if value:
+                params[name] = "true"
+        elif name in TEXT_FILTERS:
+            values = sorted(set(_as_list(value)))
+            if values:
+                params[name] = ",".join(values)
+        elif name == "distance":
+            if value:
+                params["distance"] = max(1, min(int(value), MAX_DISTANCE))
+        else:
+            raise ValueError(f"Unknown filter: {name}")
+    return params
+
+
+def split_local(filters):
+    """Split `filters` into `(local, ignored)`: what `matches` can check, and the rest."""
+    local, ignored = {}, {}
+    for name, value in (filters or {}).items():
+        if not value:
+            continue
+        (local if name in LOCAL_FILTERS else ignored)[name] = value
+    return local, ignored
+
+
+def _dog_value(value):
+    # Normalized dogs carry Petfinder's display values, e.g. "Young", "Extra Large"
+    value = (value or "").lower()
+    return "xlarge" if value == "extra large" else value
+
+
+def matches(dog, filters):
+    """True if `dog` (normalized) passes the LOCAL_FILTERS part of `filters`."""
+    for name in LOCAL_FILTERS:
+        values = _as_list((filters or {}).get(name))
+        if values and _dog_value(dog.get(name)) not in values:
+            return False
+    return True
+
+
+def filter_page(result, filters):
+    """Narrow an unfiltered deck page to the dogs that match `filters` locally.
+
+    `scanned` keeps the unfiltered count so DeckLoader can tell a page with
+    no matches from the end of the listings.
+    """
+    return {
+        "dogs": [dog for dog in result["dogs"] if matches(dog, filters)],
+        "pagination": result["pagination"],
+        "stale": result.get("stale", False),
+        "scanned": len(result["dogs"]),
+    }
+
+
+def catalog_filters(filters):
+    """The subset of `filters` the local SQLite catalog can apply (single age/size/gender)."""
+    supported = {}
+    for name in ("age", "size", "gender"):
+        values = _as_list((filters or {}).get(name))
+        if len(values) == 1:
+            # The catalog stores Petfinder's capitalized values
+            supported[name] = "Extra Large" if values[0] == "xlarge" else values[0].capitalize()
+    return supported
+
+
+def describe(filters):
+    """Short human-readable summary of active filters, e.g. "Young, Adult · Good with kids"."""
+    parts = []
+    for name, allowed in CHOICE_FILTERS.items():
+        values = [v for v in allowed if v in _as_list((filters or {}).get(name))]
+        if values and len(values) < len(allowed):
+            parts.append(", ".join(v.capitalize() for v in values))
+    parts.extend(LABELS[name] for name in FLAG_FILTERS if (filters or {}).get(name))
+    return " · ".join(parts)
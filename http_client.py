@@ -0,0 +1,267 @@
+# http_client.py
+import os
+import random
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+from rate_budget import request_budget
+
+CONNECT_TIMEOUT = float(os.getenv("PETFINDER_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.getenv("PETFINDER_READ_TIMEOUT", "10"))
+MAX_RETRIES = int(os.getenv("PETFINDER_MAX_RETRIES", "3"))
+POOL_SIZE = int(os.getenv("PETFINDER_POOL_SIZE", "10"))
+
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 8.0
+# Don't sleep longer than this inside a request; surface the 429 instead
+MAX_RETRY_AFTER = 10.0
+
+TRANSIENT_STATUSES = {500, 502, 503, 504}
+
+# Open the circuit after this many consecutive failures, for at least this long
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("PETFINDER_BREAKER_THRESHOLD", "5"))
+BREAKER_RESET_TIMEOUT = float(os.getenv("PETFINDER_BREAKER_RESET", "30"))
+
+
+class PetfinderError(Exception):
+    """Base class for Petfinder API failures."""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class RateLimitError(PetfinderError):
+    """The API answered 429; `retry_after` is the suggested wait in seconds, if given."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message, status_code=429)
+        self.retry_after = retry_after
+
+
+class BudgetExhaustedError(RateLimitError):
+    """Our own request budget is spent for this priority; the request was not sent."""
+
+
+class AuthError(PetfinderError):
+    """The API rejected our credentials or token (401/403)."""
+
+
+class TransientError(PetfinderError):
+    """Network failure or 5xx that persisted through all retries."""
+
+
+class CircuitOpenError(TransientError):
+    """The circuit breaker is open; the request was not sent."""
+
+
+class CircuitBreaker:
+    """Stops sending requests for a while after repeated failures or a 429.
+
+    Closed: requests flow. Open: requests fail fast with CircuitOpenError until
+    `reset_timeout` has passed. Then one trial request is let through; success
+    closes the circuit, failure reopens it. A 429 with Retry-After holds
+    requests for exactly that long; one without it counts as a failure.
+    """
+
+    def __init__(self, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_timeout=BREAKER_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._open_until = 0.0
+        self._trial_in_flight = False
+
+    @property
+    def is_open(self):
+        return time.time() < self._open_until
+
+    def before_request(self):
+        """Raise CircuitOpenError unless a request may be sent now."""
+        with self._lock:
+            now = time.time()
+            if now < self._open_until:
+                raise CircuitOpenError(f"Petfinder circuit open for another {self._open_until - now:.0f}s")
+            if self._failures >= self.failure_threshold:
+                # Half-open: allow a single trial request
+                if self._trial_in_flight:
+                    raise CircuitOpenError("Petfinder circuit half-open; trial request in flight")
+                self._trial_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._open_until = 0.0
+            self._trial_in_flight = False
+
+    def release_trial(self):
+        """Give back a half-open trial slot without recording an outcome."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self, retry_after=None):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            now = time.time()
+            if retry_after:
+                self._open_until = max(self._open_until, now + retry_after)
+            if self._failures >= self.failure_threshold:
+                self._open_until = max(self._open_until, now + self.reset_timeout)
+
+
+def _build_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+# One keep-alive connection pool and breaker shared by every caller in the process
+_session = _build_session()
+circuit_breaker = CircuitBreaker()
+
+
+def get_session():
+    """Return the shared pooled session."""
+    return _session
+
+
+def parse_retry_after(value):
+    """Parse a Retry-After header (seconds or HTTP date) into seconds."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, retry_after=None):
+    """Full-jitter exponential backoff, never shorter than Retry-After."""
+    delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+def _endpoint_label(url):
+    """Collapse ids out of the URL path so metrics labels stay low-cardinality."""
+    return re.sub(r"/\d+", "/:id", urlparse(url).path)
+
+
+def _track_rate_limit(response, endpoint):
+    """Export Petfinder's X-RateLimit-* headers as gauges and feed them to the budget."""
+    request_budget.update_from_headers(response.headers)
+    for header, gauge in (
+        ("X-RateLimit-Remaining", "petlights_ratelimit_remaining"),
+        ("X-RateLimit-Limit", "petlights_ratelimit_limit"),
+        ("X-RateLimit-Reset", "petlights_ratelimit_reset"),
+    ):
+        value = response.headers.get(header)
+        if value is None:
+            continue
+        try:
+            metrics.set_gauge(gauge, float(value), endpoint=endpoint)
+        except ValueError:
+            pass
+
+
+def request(method, url, max_retries=MAX_RETRIES, timeout=None, **kwargs):
+    """Send a request through the shared session with bounded, jittered retries.
+
+    Returns the response on 2xx and raises a PetfinderError subclass otherwise.
+    Rate limits and transient failures count against the shared circuit breaker.
+    Every attempt first takes a slot from the shared request budget at the
+    caller's priority (see rate_budget.priority).
+    """
+    try:
+        circuit_breaker.before_request()
+    except CircuitOpenError:
+        metrics.inc("petlights_circuit_rejections_total", endpoint=_endpoint_label(url))
+        raise
+    try:
+        response = _request_with_retries(method, url, max_retries, timeout, **kwargs)
+    except BudgetExhaustedError:
+        # Nothing was sent, so the API's health is unknown
+        circuit_breaker.release_trial()
+        raise
+    except RateLimitError as e:
+        circuit_breaker.record_failure(retry_after=e.retry_after)
+        raise
+    except TransientError:
+        circuit_breaker.record_failure()
+        raise
+    except PetfinderError:
+        # Client errors mean the API is up; don't trip the breaker
+        circuit_breaker.record_success()
+        raise
+    circuit_breaker.record_success()
+    return response
+
+
+def _request_with_retries(method, url, max_retries, timeout, **kwargs):
+    timeout = timeout or (CONNECT_TIMEOUT, READ_TIMEOUT)
+    endpoint = _endpoint_label(url)
+    attempt = 0
+    while True:
+        if not request_budget.acquire():
+            raise BudgetExhaustedError("Request budget exhausted", retry_after=request_budget.retry_after())
+        start = time.perf_counter()
+        try:
+            response = _session.request(method, url, timeout=timeout, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            metrics.observe("petlights_http_request_seconds", time.perf_counter() - start,
+                            endpoint=endpoint, method=method, status="network_error")
+            if attempt >= max_retries:
+                raise TransientError(f"Request failed after {attempt + 1} attempts: {e}") from e
+            metrics.inc("petlights_http_retries_total", endpoint=endpoint, reason="network_error")
+            time.sleep(backoff_delay(attempt))
+            attempt += 1
+            continue
+        except requests.exceptions.RequestException as e:
+            raise PetfinderError(str(e)) from e
+
+        status = response.status_code
+        metrics.observe("petlights_http_request_seconds", time.perf_counter() - start,
+                        endpoint=endpoint, method=method, status=status)
+        _track_rate_limit(response, endpoint)
+        if status < 400:
+            return response
+        # Hand the connection back to the pool; streamed bodies are otherwise left unread
+        response.close()
+
+        if status == 429:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            request_budget.pause(retry_after if retry_after is not None else backoff_delay(attempt))
+            if attempt >= max_retries or (retry_after or 0) > MAX_RETRY_AFTER:
+                raise RateLimitError("429 Rate Limit Exceeded", retry_after=retry_after)
+            metrics.inc("petlights_http_retries_total", endpoint=endpoint, reason="429")
+            time.sleep(backoff_delay(attempt, retry_after))
+            attempt += 1
+            continue
+
+        if status in TRANSIENT_STATUSES:
+            if attempt >= max_retries:
+                raise TransientError(f"{status} Server Error for url: {url}", status_code=status)
+            metrics.inc("petlights_http_retries_total", endpoint=endpoint, reason=str(status))
+            time.sleep(backoff_delay(attempt, parse_retry_after(response.headers.get("Retry-After"))))
+            attempt += 1
+            continue
+
+        if status in (401, 403):
+            raise AuthError(f"{status} Unauthorized for url: {url}", status_code=status)
+
+        raise PetfinderError(f"{status} Client Error for url: {url}", status_code=status)
@@ -0,0 +1,154 @@
+# image_cache.py
+import hashlib
+import io
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from http_client import CONNECT_TIMEOUT, READ_TIMEOUT, get_session
+from storage import atomic_write_bytes
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; without it photos are cached as-is
+    Image = None
+
+IMAGE_CACHE_DIR = os.getenv("PETLIGHTS_IMAGE_CACHE_DIR", "image_cache")
+MAX_CACHE_BYTES = int(os.getenv("PETLIGHTS_IMAGE_CACHE_MB", "200")) * 1024 * 1024
+# Bounding box photos are shrunk to; roughly the width of the card column
+CARD_SIZE = (600, 600)
+# How many upcoming cards to prefetch photos for
+PREFETCH_COUNT = 3
+# Seconds to wait before retrying a photo whose download failed
+FAILURE_TTL = float(os.getenv("PETLIGHTS_IMAGE_FAILURE_TTL", "300"))
+
+
+class ImageCache:
+    """Size-bounded on-disk cache of card-sized photos, filled by a thread pool.
+
+    Photos are downloaded once per process (and kept across restarts), shrunk
+    to `CARD_SIZE`, and evicted least-recently-used once the directory grows
+    past `max_bytes`. URLs that fail to download are not retried for
+    `failure_ttl` seconds.
+    """
+
+    def __init__(self, directory=IMAGE_CACHE_DIR, max_bytes=MAX_CACHE_BYTES, size=CARD_SIZE, workers=4,
+                 failure_ttl=FAILURE_TTL):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.size = size
+        self._lock = threading.Lock()
+        self._inflight = set()
+        self.failure_ttl = failure_ttl
+        # url -> monotonic time after which a failed download may be retried
+        self._failed = {}
+        self._total_bytes = None
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image-prefetch")
+        os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, url):
+        digest = hashlib.sha1(f"{url}|{self.size[0]}x{self.size[1]}".encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest + ".jpg")
+
+    def get(self, url):
+        """Return the local path for `url` if it is cached, else None."""
+        path = self.path_for(url)
+        try:
+            # Bump mtime so eviction treats this photo as recently used
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def image_for(self, url):
+        """Return something `st.image` can show: the cached file or, on a miss, the URL itself."""
+        path = self.get(url)
+        if path is not None:
+            return path
+        self.prefetch([url])
+        return url
+
+    def prefetch(self, urls):
+        """Download and resize any of `urls` that are not cached yet, in the background."""
+        for url in urls:
+            if not url:
+                continue
+            with self._lock:
+                if url in self._inflight or os.path.exists(self.path_for(url)):
+                    continue
+                retry_at = self._failed.get(url)
+                if retry_at is not None:
+                    if time.monotonic() < retry_at:
+                        continue
+                    del self._failed[url]
+                self._inflight.add(url)
+            self._executor.submit(self._fetch, url)
+
+    def _fetch(self, url):
+        try:
+            response = get_session().get(url, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+            response.raise_for_status()
+            payload = self._resize(response.content)
+            path = self.path_for(url)
+            atomic_write_bytes(path, payload)
+            self._account(len(payload))
+        except (requests.exceptions.RequestException, OSError) as e:
+            print(f"Error prefetching photo {url}: {e}")
+            self._remember_failure(url)
+        finally:
+            with self._lock:
+                self._inflight.discard(url)
+
+    def _remember_failure(self, url):
+        now = time.monotonic()
+        with self._lock:
+            # Drop expired entries so dead URLs don't accumulate forever
+            for expired in [u for u, retry_at in self._failed.items() if retry_at <= now]:
+                del self._failed[expired]
+            self._failed[url] = now + self.failure_ttl
+
+    def _resize(self, content):
+        if Image is None:
+            return content
+        try:
+            with Image.open(io.BytesIO(content)) as img:
+                img.thumbnail(self.size)
+                out = io.BytesIO()
+                img.convert("RGB").save(out, format="JPEG", quality=85, optimize=True)
+                return out.getvalue()
+        except OSError:
+            # Not an image Pillow understands; cache the original bytes
+            return content
+
+    def _account(self, added):
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(entry.stat().st_size for entry in os.scandir(self.directory))
+            else:
+                self._total_bytes += added
+            if self._total_bytes <= self.max_bytes:
+                return
+            self._evict()
+
+    def _evict(self):
+        """Delete least-recently-used photos until the cache is at 90% of its budget. Caller holds the lock."""
+        entries = sorted(os.scandir(self.directory), key=lambda entry: entry.stat().st_mtime)
+        target = self.max_bytes * 0.9
+        total = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if total <= target:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                total -= size
+            except OSError:
+                pass
+        self._total_bytes = total
+
+
+# One photo cache per process, shared by every session
+image_cache = ImageCache()
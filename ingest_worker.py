@@ -0,0 +1,136 @@
+# ingest_worker.py
+"""Keep the shared Petfinder cache warm outside the web app.
+
+Fetches the first pages of every configured location on a schedule and
+writes the normalized results into the shared query cache (and optionally
+the local SQLite catalog). With several locations it warms the same
+fan-out queries app.py runs, so the cache keys line up. Run web workers
+with PETLIGHTS_READ_ONLY=1 so they only read what this process writes:
+
+    python ingest_worker.py --locations 85004,85281 --pages 5 --interval 900
+"""
+import argparse
+import os
+import time
+
+import metrics
+from api_service import (
+    PAGE_SIZE, CircuitOpenError, PetfinderError, RateLimitError,
+    get_token, refresh_page, refresh_query,
+)
+from catalog_db import AnimalCatalog, sync
+from fanout import LOCATIONS as APP_LOCATIONS, build_queries, parse_locations
+from image_cache import image_cache
+from rate_budget import BACKGROUND, priority
+
+# Defaults to the web app's locations so both sides agree on which queries are cached
+LOCATIONS = os.getenv("PETLIGHTS_INGEST_LOCATIONS", APP_LOCATIONS)
+PAGES = int(os.getenv("PETLIGHTS_INGEST_PAGES", "5"))
+# Must stay below the query cache TTL so readers never see an expired page
+INTERVAL = int(os.getenv("PETLIGHTS_INGEST_INTERVAL", "900"))
+
+
+def ingest_location(location, pages=PAGES, limit=PAGE_SIZE, photos=False):
+    """Refresh up to `pages` deck pages for `location`. Returns the dogs written."""
+    written = 0
+    for page in range(1, pages + 1):
+        result = refresh_page(get_token(), location=location, limit=limit, page=page)
+        if not result or not result["dogs"]:
+            break
+        written += len(result["dogs"])
+        metrics.inc("petlights_ingest_pages_total", location=location)
+        if photos:
+            image_cache.prefetch([dog["photo"] for dog in result["dogs"]])
+
+        total_pages = result["pagination"].get("total_pages")
+        if total_pages is not None and page >= total_pages:
+            break
+    return written
+
+
+def ingest_fanout(locations, pages=PAGES, limit=PAGE_SIZE, photos=False):
+    """Refresh up to `pages` fan-out deck pages across `locations`. Returns the dogs written.
+
+    These are the queries app.py sends when several locations are configured.
+    """
+    written = 0
+    for page in range(1, pages + 1):
+        more = False
+        for params in build_queries(locations, limit=limit, page=page):
+            result = refresh_query(get_token(), params)
+            if not result or not result["dogs"]:
+                continue
+            written += len(result["dogs"])
+            metrics.inc("petlights_ingest_pages_total", location=params["location"])
+            if photos:
+                image_cache.prefetch([dog["photo"] for dog in result["dogs"]])
+            total_pages = result["pagination"].get("total_pages")
+            if total_pages is None or page < total_pages:
+                more = True
+        if not more:
+            break
+    return written
+
+
+def _ingest_pages(locations, pages, photos):
+    if len(locations) > 1:
+        # app.py searches several locations together; warm exactly those queries
+        written = ingest_fanout(locations, pages=pages, photos=photos)
+    else:
+        written = ingest_location(locations[0], pages=pages, photos=photos)
+    print(f"Ingested {written} dogs for {', '.join(locations)}")
+
+
+def run_cycle(locations, pages=PAGES, photos=False, catalog=None):
+    """Refresh every location once. Returns seconds to wait before retrying early, or None.
+
+    Runs at background priority, so it yields budget to any interactive
+    traffic in this process and leaves a share of the daily quota unused.
+    """
+    steps = [(", ".join(locations), lambda: _ingest_pages(locations, pages, photos))]
+    if catalog is not None:
+        steps.extend((location, lambda location=location: sync(catalog, location=location)) for location in locations)
+
+    with metrics.timed("petlights_ingest_cycle_seconds"), priority(BACKGROUND):
+        for label, step in steps:
+            try:
+                step()
+            except RateLimitError as e:
+                # Out of quota: stop this cycle and come back once it resets
+                print(f"Rate limited while ingesting {label}: {e}")
+                return e.retry_after or 60
+            except CircuitOpenError as e:
+                print(f"Petfinder unavailable, skipping this cycle: {e}")
+                return 30
+            except PetfinderError as e:
+                metrics.inc("petlights_ingest_errors_total", location=label)
+                print(f"Error ingesting {label}: {e}")
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-fetch Petfinder pages into the shared cache.")
+    parser.add_argument("--locations", default=LOCATIONS, help="comma-separated ZIP codes")
+    parser.add_argument("--pages", type=int, default=PAGES, help="deck pages to refresh per location")
+    parser.add_argument("--interval", type=int, default=INTERVAL, help="seconds between cycles")
+    parser.add_argument("--photos", action="store_true", help="also warm the photo cache")
+    parser.add_argument("--catalog", action="store_true", help="also sync the local SQLite catalog")
+    parser.add_argument("--once", action="store_true", help="run a single cycle and exit")
+    args = parser.parse_args()
+
+    locations = parse_locations(args.locations)
+    catalog = AnimalCatalog() if args.catalog else None
+    metrics.start_http_server()
+
+    while True:
+        started = time.monotonic()
+        retry_in = run_cycle(locations, pages=args.pages, photos=args.photos, catalog=catalog)
+        if args.once:
+            return
+        if retry_in is None:
+            retry_in = max(0, args.interval - (time.monotonic() - started))
+        time.sleep(retry_in)
+
+
+if __name__ == "__main__":
+    main()
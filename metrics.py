@@ -0,0 +1,177 @@
+# metrics.py
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Set to "json" to also emit every observation as a structured log line on stderr
+METRICS_LOG = os.getenv("PETLIGHTS_METRICS_LOG", "")
+# Serve Prometheus text format on this port (e.g. 9108) when set
+METRICS_PORT = os.getenv("PETLIGHTS_METRICS_PORT")
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+logger = logging.getLogger("petlights.metrics")
+if METRICS_LOG == "json" and not logger.handlers:
+    _handler = logging.StreamHandler(sys.stderr)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(label_key, extra=()):
+    pairs = list(label_key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Registry:
+    """Thread-safe counters, gauges and histograms keyed by name and labels."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        _log("counter", name, value, labels)
+
+    def set_gauge(self, name, value, **labels):
+        with self._lock:
+            self._gauges[(name, _label_key(labels))] = value
+        _log("gauge", name, value, labels)
+
+    def observe(self, name, value, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    hist["buckets"][i] += 1
+            hist["sum"] += value
+            hist["count"] += 1
+        _log("histogram", name, value, labels)
+
+    def snapshot(self):
+        """Return every metric as plain data, for JSON export or tests."""
+        with self._lock:
+            return {
+                "counters": [{"name": n, "labels": dict(l), "value": v} for (n, l), v in self._counters.items()],
+                "gauges": [{"name": n, "labels": dict(l), "value": v} for (n, l), v in self._gauges.items()],
+                "histograms": [
+                    {"name": n, "labels": dict(l), "sum": h["sum"], "count": h["count"],
+                     "buckets": dict(zip(self.buckets, h["buckets"]))}
+                    for (n, l), h in self._histograms.items()
+                ],
+            }
+
+    def render_prometheus(self):
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for kind, series in (("counter", self._counters), ("gauge", self._gauges)):
+                for name in sorted({n for n, _ in series}):
+                    lines.append(f"# TYPE {name} {kind}")
+                    for (n, labels), value in series.items():
+                        if n == name:
+                            lines.append(f"{name}{_format_labels(labels)} {value}")
+            for name in sorted({n for n, _ in self._histograms}):
+                lines.append(f"# TYPE {name} histogram")
+                for (n, labels), hist in self._histograms.items():
+                    if n != name:
+                        continue
+                    for bound, count in zip(self.buckets, hist["buckets"]):
+                        lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {count}")
+                    lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {hist['count']}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {hist['sum']}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {hist['count']}")
+        return "\n".join(lines) + "\n"
+
+
+def _log(kind, name, value, labels):
+    if METRICS_LOG == "json":
+        logger.info(json.dumps({"ts": time.time(), "type": kind, "metric": name, "value": value, "labels": labels}))
+
+
+# Process-wide registry and shortcuts to it
+registry = Registry()
+inc = registry.inc
+set_gauge = registry.set_gauge
+observe = registry.observe
+render_prometheus = registry.render_prometheus
+
+
+@contextmanager
+def timed(name, **labels):
+    """Observe how long the block takes, labelled with `outcome="error"` if it raises."""
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield labels
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        observe(name, time.perf_counter() - start, outcome=outcome, **labels)
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_http_server(port=None):
+    """Serve /metrics on `port` (default PETLIGHTS_METRICS_PORT). Safe to call repeatedly."""
+    global _server
+    port = port or METRICS_PORT
+    if not port:
+        return None
+    with _server_lock:
+        if _server is not None:
+            return _server or None
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        try:
+            _server = ThreadingHTTPServer(("0.0.0.0", int(port)), Handler)
+        except OSError as e:
+            # Another worker on this box already owns the port
+            print(f"Metrics server not started on port {port}: {e}")
+            _server = False
+            return None
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+        return _server
@@ -0,0 +1,102 @@
+# page_decoder.py
+import json
+
+import urllib3
+
+# Optional faster backends: ijson decodes incrementally, orjson parses whole bodies faster
+try:
+    import ijson
+    from ijson.common import ObjectBuilder
+except ImportError:
+    ijson = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Read the body in chunks of this size when streaming
+CHUNK_SIZE = 16 * 1024
+
+STREAMING = ijson is not None
+
+
+class DecodeError(ValueError):
+    """The response body was not valid JSON or could not be read to the end."""
+
+
+def loads(data):
+    """Parse a complete JSON document with the fastest available backend."""
+    try:
+        if orjson is not None:
+            return orjson.loads(data)
+        return json.loads(data)
+    except ValueError as e:
+        raise DecodeError(str(e)) from e
+
+
+class AnimalStream:
+    """Iterate the animals of an /animals response as they are decoded.
+
+    Send the request with `stream=True`. With ijson installed the body is
+    parsed straight off the socket and each animal is yielded as soon as its
+    object closes, so the raw page is never held in memory as a whole.
+    Otherwise the body is read into a local buffer (not cached on the
+    response), parsed in one go, and freed before animals are handed out
+    and released one at a time. `pagination` is filled in once iteration ends.
+    """
+
+    def __init__(self, response):
+        self._response = response
+        self.pagination = {}
+
+    def __iter__(self):
+        try:
+            if STREAMING:
+                yield from self._iter_streaming()
+            else:
+                yield from self._iter_buffered()
+        finally:
+            self._response.close()
+
+    def _iter_buffered(self):
+        data = loads(self._read_body())
+        self.pagination = data.get("pagination") or {}
+        animals = data.get("animals") or []
+        data = None
+        # Pop from the end so each raw animal can be freed once it's been yielded
+        animals.reverse()
+        while animals:
+            yield animals.pop()
+
+    def _read_body(self):
+        """The whole body, without leaving a copy cached on the response."""
+        raw = self._response.raw
+        raw.decode_content = True
+        try:
+            return raw.read()
+        except (OSError, urllib3.exceptions.HTTPError) as e:
+            raise DecodeError(str(e)) from e
+
+    def _iter_streaming(self):
+        raw = self._response.raw
+        raw.decode_content = True
+        builder = None
+        target = None
+        try:
+            for prefix, event, value in ijson.parse(raw, buf_size=CHUNK_SIZE, use_float=True):
+                if builder is None:
+                    if event == "start_map" and prefix in ("animals.item", "pagination"):
+                        builder = ObjectBuilder()
+                        target = prefix
+                    else:
+                        continue
+                builder.event(event, value)
+                if event == "end_map" and prefix == target:
+                    if target == "pagination":
+                        self.pagination = builder.value
+                    else:
+                        yield builder.value
+                    builder = None
+        except (ijson.JSONError, OSError, urllib3.exceptions.HTTPError) as e:
+            raise DecodeError(str(e)) from e
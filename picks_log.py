@@ -0,0 +1,192 @@
+# picks_log.py
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from storage import file_lock
+
+PICKS_DIR = os.getenv("PETLIGHTS_PICKS_DIR", "picks")
+# Fold the log into the snapshot once it holds this many records
+COMPACT_EVERY = int(os.getenv("PETLIGHTS_PICKS_COMPACT_EVERY", "50"))
+# Fields kept per pick so the "My Picks" sheet can be rebuilt without the API
+PICK_FIELDS = ("id", "name", "breed", "url", "photo")
+# Snapshots hold one record per line inside this wrapper, so they stay valid
+# JSON but can be read back a record at a time
+SNAPSHOT_HEAD = '{"picks": [\n'
+SNAPSHOT_FOOT = ']}\n'
+
+_compact_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="picks-compact")
+
+
+def safe_user_id(user_id):
+    """Reduce a user/session id to something usable as a file name."""
+    cleaned = re.sub(r"[^A-Za-z0-9_-]", "", str(user_id))[:64]
+    return cleaned or "anonymous"
+
+
+def _iter_snapshot(f):
+    """Yield the records of an open snapshot file, one line at a time."""
+    f.seek(0)
+    first = f.readline()
+    if first.decode("utf-8") != SNAPSHOT_HEAD:
+        # Written before snapshots were line-per-record; load it whole
+        f.seek(0)
+        try:
+            yield from json.loads(f.read() or b"{}").get("picks", [])
+        except ValueError as e:
+            print(f"Error reading picks snapshot: {e}")
+        return
+    for line in f:
+        line = line.strip().rstrip(b",")
+        if not line or line == SNAPSHOT_FOOT.strip().encode("utf-8"):
+            continue
+        yield json.loads(line)
+
+
+class PicksView:
+    """A fixed, re-iterable view of a user's latest picks.
+
+    Holds the snapshot file open (so a concurrent compaction can't change it
+    underneath) plus the log tail, and streams the snapshot on every pass
+    rather than loading it. Use as a context manager, or call `close()`.
+    """
+
+    def __init__(self, snapshot_file, tail):
+        self._file = snapshot_file
+        self._tail = tail
+
+    def __iter__(self):
+        pending = dict(self._tail)
+        if self._file is not None:
+            for record in _iter_snapshot(self._file):
+                yield pending.pop(record["id"], record)
+        yield from pending.values()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class PicksLog:
+    """Append-only log of one user's rankings, compacted into a snapshot.
+
+    Every ranking is one JSON line appended to `<user>.log`. Compaction folds
+    the log into `<user>.json` (latest choice per dog) and truncates the log,
+    so loading is one snapshot read plus a tail of at most COMPACT_EVERY lines.
+    """
+
+    def __init__(self, user_id, directory=PICKS_DIR, compact_every=COMPACT_EVERY):
+        self.user_id = safe_user_id(user_id)
+        self.compact_every = compact_every
+        os.makedirs(directory, exist_ok=True)
+        self.log_path = os.path.join(directory, self.user_id + ".log")
+        self.snapshot_path = os.path.join(directory, self.user_id + ".json")
+        self._lock = threading.Lock()
+        self._tail = 0
+        self._compacting = False
+
+    def append(self, dog, choice):
+        """Record one ranking. Cheap enough to call on every swipe."""
+        record = {field: dog.get(field) for field in PICK_FIELDS}
+        record["choice"] = choice
+        record["ts"] = time.time()
+        line = (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+        with metrics.timed("petlights_picks_append_seconds"):
+            with file_lock(self.log_path):
+                with open(self.log_path, "ab") as f:
+                    f.write(line)
+        with self._lock:
+            self._tail += 1
+            if self._tail < self.compact_every or self._compacting:
+                return
+            self._compacting = True
+        _compact_executor.submit(self._compact_in_background)
+
+    def load(self):
+        """Return `{dog_id: record}` with each dog's latest choice."""
+        with self.view() as picks:
+            return {record["id"]: record for record in picks}
+
+    def view(self):
+        """Return a PicksView of each dog's latest record, streamed from disk."""
+        with file_lock(self.log_path):
+            tail = self._read_tail()
+            try:
+                snapshot_file = open(self.snapshot_path, "rb")
+            except FileNotFoundError:
+                snapshot_file = None
+        with self._lock:
+            self._tail = sum(len(records) for records in tail.values())
+        return PicksView(snapshot_file, {animal_id: records[-1] for animal_id, records in tail.items()})
+
+    def compact(self):
+        """Fold the log into the snapshot and truncate the log."""
+        with metrics.timed("petlights_picks_compact_seconds"):
+            with file_lock(self.log_path):
+                tail = self._read_tail()
+                if not tail:
+                    return
+                self._write_snapshot(tail)
+                # Only truncate once the snapshot holding these records is in place
+                open(self.log_path, "wb").close()
+        with self._lock:
+            self._tail = 0
+
+    def _compact_in_background(self):
+        try:
+            self.compact()
+        except OSError as e:
+            print(f"Error compacting picks for {self.user_id}: {e}")
+        finally:
+            with self._lock:
+                self._compacting = False
+
+    def _read_tail(self):
+        """`{dog_id: [records]}` from the log, oldest first. Caller holds the file lock."""
+        tail = {}
+        if os.path.exists(self.log_path):
+            with open(self.log_path, "rb") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Torn write from a crashed process; skip it
+                        continue
+                    tail.setdefault(record["id"], []).append(record)
+        return tail
+
+    def _write_snapshot(self, tail):
+        """Stream the current snapshot plus `tail` into a new snapshot. Caller holds the file lock."""
+        try:
+            snapshot_file = open(self.snapshot_path, "rb")
+        except FileNotFoundError:
+            snapshot_file = None
+        view = PicksView(snapshot_file, {animal_id: records[-1] for animal_id, records in tail.items()})
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.snapshot_path)), prefix=".tmp-")
+        try:
+            with view, os.fdopen(fd, "wb") as out:
+                out.write(SNAPSHOT_HEAD.encode("utf-8"))
+                separator = b""
+                for record in view:
+                    out.write(separator + json.dumps(record, separators=(",", ":")).encode("utf-8"))
+                    separator = b",\n"
+                out.write(b"\n" + SNAPSHOT_FOOT.encode("utf-8"))
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
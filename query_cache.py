@@ -0,0 +1,150 @@
+# query_cache.py
+import gzip
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+from storage import atomic_write_bytes, file_lock
+
+CACHE_FILE = os.getenv("PETLIGHTS_CACHE_FILE", "query_cache.json")
+CACHE_COMPRESS = os.getenv("PETLIGHTS_CACHE_COMPRESS", "0") == "1"
+MAX_ENTRIES = int(os.getenv("PETLIGHTS_CACHE_MAX_ENTRIES", "256"))
+DEFAULT_TTL = 3600
+# How long an expired entry is kept around as last-good data
+STALE_TTL = int(os.getenv("PETLIGHTS_CACHE_STALE_TTL", str(24 * 3600)))
+CACHE_FORMAT_VERSION = 1
+
+
+def normalize_query(params):
+    """Build a stable cache key from request parameters.
+
+    Keys are lowercased, string values stripped and lowercased, and
+    parameters set to None are dropped, so equivalent queries share an entry.
+    """
+    normalized = {}
+    for key, value in params.items():
+        if value is None:
+            continue
+        if isinstance(value, str):
+            value = value.strip().lower()
+        normalized[str(key).lower()] = value
+    return json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+
+
+class QueryCache:
+    """Size-bounded LRU cache of API results keyed on normalized query params.
+
+    Entries live in memory and in a single JSON (optionally gzipped) file that
+    is rewritten atomically under a cross-process lock, so several workers can
+    share it. Reads only reparse the file when another process changed it.
+    """
+
+    def __init__(self, path=CACHE_FILE, max_entries=MAX_ENTRIES, ttl=DEFAULT_TTL, compress=CACHE_COMPRESS,
+                 stale_ttl=STALE_TTL):
+        if compress and not path.endswith(".gz"):
+            path += ".gz"
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.compress = compress
+        self.stale_ttl = stale_ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._touched = set()
+        self._file_stamp = None
+
+    def get(self, params):
+        """Return cached data for `params`, or None if missing or expired."""
+        found = self.get_entry(params)
+        if found is None or found[1]:
+            return None
+        return found[0]
+
+    def get_entry(self, params):
+        """Return `(data, is_stale)` for `params`, including expired last-good data, or None."""
+        key = normalize_query(params)
+        with self._lock:
+            self._reload_if_changed()
+            entry = self._entries.get(key)
+            now = time.time()
+            if entry is None or entry["expires_at"] + self.stale_ttl <= now:
+                metrics.inc("petlights_cache_lookups_total", cache="query", result="miss")
+                return None
+            self._entries.move_to_end(key)
+            self._touched.add(key)
+            is_stale = entry["expires_at"] <= now
+            metrics.inc("petlights_cache_lookups_total", cache="query", result="stale" if is_stale else "hit")
+            return entry["data"], is_stale
+
+    def set(self, params, data, ttl=None):
+        """Store `data` for `params` and persist the cache."""
+        key = normalize_query(params)
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock, file_lock(self.path):
+            # Pick up entries other workers wrote since we last looked
+            self._reload_if_changed()
+            self._entries[key] = {"expires_at": time.time() + ttl, "data": data}
+            self._entries.move_to_end(key)
+            self._evict()
+            self._write()
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock, file_lock(self.path):
+            self._entries.clear()
+            self._touched.clear()
+            self._write()
+
+    def _evict(self):
+        now = time.time()
+        for key in [k for k, entry in self._entries.items() if entry["expires_at"] + self.stale_ttl <= now]:
+            del self._entries[key]
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _reload_if_changed(self):
+        stamp = self._stamp()
+        if stamp is None or stamp == self._file_stamp:
+            return
+        try:
+            opener = gzip.open if self.compress else open
+            with opener(self.path, "rb") as f:
+                payload = json.loads(f.read().decode("utf-8"))
+        except (OSError, ValueError) as e:
+            print(f"Error loading cache: {e}")
+            return
+        if payload.get("version") != CACHE_FORMAT_VERSION:
+            return
+
+        entries = OrderedDict((key, entry) for key, entry in payload.get("entries", []))
+        # Keep our own recent reads at the MRU end so LRU order survives the merge
+        for key in self._touched:
+            if key in entries:
+                entries.move_to_end(key)
+        self._entries = entries
+        self._file_stamp = stamp
+
+    def _write(self):
+        payload = json.dumps({
+            "version": CACHE_FORMAT_VERSION,
+            "entries": list(self._entries.items()),
+        }).encode("utf-8")
+        if self.compress:
+            payload = gzip.compress(payload)
+        try:
+            atomic_write_bytes(self.path, payload)
+        except OSError as e:
+            print(f"Error saving cache: {e}")
+            return
+        self._touched.clear()
+        self._file_stamp = self._stamp()
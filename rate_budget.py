@@ -0,0 +1,174 @@
+# rate_budget.py
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import metrics
+
+# Petfinder allows this many requests per second and per day
+RATE_PER_SECOND = float(os.getenv("PETFINDER_RATE_PER_SECOND", "50"))
+DAILY_LIMIT = int(os.getenv("PETFINDER_DAILY_LIMIT", "1000"))
+
+# Lower number = served first
+INTERACTIVE = 0
+PREFETCH = 1
+BACKGROUND = 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", PREFETCH: "prefetch", BACKGROUND: "background"}
+
+# Share of the per-second bucket and of the daily quota each priority must leave untouched
+BURST_RESERVE = {INTERACTIVE: 0.0, PREFETCH: 0.25, BACKGROUND: 0.5}
+DAILY_RESERVE = {INTERACTIVE: 0.0, PREFETCH: 0.1, BACKGROUND: 0.25}
+
+# How long a request may wait for budget before giving up, per priority
+MAX_WAIT = {INTERACTIVE: 5.0, PREFETCH: 30.0, BACKGROUND: 120.0}
+
+_current_priority = contextvars.ContextVar("request_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def priority(level):
+    """Run the block's Petfinder requests at `level`."""
+    token = _current_priority.set(level)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority():
+    return _current_priority.get()
+
+
+class RateBudget:
+    """Token bucket over Petfinder's per-second and daily limits.
+
+    Every request takes one token. Lower priorities must leave a reserve of
+    both the bucket and the daily quota untouched and yield to any waiting
+    higher-priority request, so background work slows down first when the
+    budget runs low. Daily quota is tracked locally and corrected from the
+    X-RateLimit-* response headers; a 429 pauses everyone until Retry-After.
+    """
+
+    def __init__(self, rate=RATE_PER_SECOND, daily_limit=DAILY_LIMIT):
+        self.rate = rate
+        self.burst = max(1.0, rate)
+        self._cond = threading.Condition()
+        self._tokens = self.burst
+        self._refilled_at = time.monotonic()
+        self._daily_limit = daily_limit
+        self._daily_remaining = daily_limit
+        self._daily_reset_at = time.time() + 24 * 3600
+        self._paused_until = 0.0
+        self._waiting = {level: 0 for level in PRIORITY_NAMES}
+
+    def acquire(self, level=None, timeout=None):
+        """Take one request slot, waiting up to `timeout` seconds. Returns False on timeout."""
+        level = current_priority() if level is None else level
+        timeout = MAX_WAIT[level] if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        start = time.monotonic()
+        with self._cond:
+            self._waiting[level] += 1
+            try:
+                while True:
+                    wait = self._wait_time(level)
+                    if wait <= 0:
+                        self._tokens -= 1
+                        self._daily_remaining -= 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if wait > remaining:
+                        metrics.inc("petlights_budget_rejections_total", priority=PRIORITY_NAMES[level])
+                        return False
+                    self._cond.wait(min(wait, remaining))
+            finally:
+                self._waiting[level] -= 1
+                self._cond.notify_all()
+        waited = time.monotonic() - start
+        if waited > 0.001:
+            metrics.observe("petlights_budget_wait_seconds", waited, priority=PRIORITY_NAMES[level])
+        metrics.set_gauge("petlights_budget_daily_remaining", self._daily_remaining)
+        return True
+
+    def retry_after(self, level=None):
+        """Seconds until a request at `level` could go out."""
+        level = current_priority() if level is None else level
+        with self._cond:
+            return max(0.0, self._wait_time(level))
+
+    def pause(self, seconds):
+        """Hold every request for `seconds`, e.g. after a 429."""
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = min(self._tokens, 0.0)
+
+    def update_from_headers(self, headers):
+        """Adopt the server's view of the daily quota from X-RateLimit-* headers."""
+        limit = _header_number(headers, "X-RateLimit-Limit")
+        remaining = _header_number(headers, "X-RateLimit-Remaining")
+        reset = _header_number(headers, "X-RateLimit-Reset")
+        if limit is None and remaining is None:
+            return
+        with self._cond:
+            if limit is not None:
+                self._daily_limit = int(limit)
+            if remaining is not None:
+                self._daily_remaining = int(remaining)
+            if reset is not None:
+                # Either an epoch timestamp or seconds until reset
+                self._daily_reset_at = reset if reset > 1e9 else time.time() + reset
+            self._cond.notify_all()
+
+    def state(self):
+        """Current budget, for dashboards and the app's status line."""
+        with self._cond:
+            self._refill()
+            return {
+                "tokens": round(self._tokens, 2),
+                "rate_per_second": self.rate,
+                "daily_limit": self._daily_limit,
+                "daily_remaining": self._daily_remaining,
+                "daily_reset_at": self._daily_reset_at,
+                "paused_for": round(max(0.0, self._paused_until - time.monotonic()), 2),
+                "waiting": {PRIORITY_NAMES[level]: count for level, count in self._waiting.items()},
+            }
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+        if time.time() >= self._daily_reset_at:
+            self._daily_remaining = self._daily_limit
+            self._daily_reset_at = time.time() + 24 * 3600
+
+    def _wait_time(self, level):
+        """Seconds `level` must wait for a slot; <= 0 means go now. Caller holds the lock."""
+        self._refill()
+        now = time.monotonic()
+        if self._paused_until > now:
+            return self._paused_until - now
+        if any(self._waiting[higher] for higher in PRIORITY_NAMES if higher < level):
+            # Yield to queued higher-priority requests; they notify on exit
+            return 1.0 / self.rate
+        if self._daily_remaining <= self._daily_limit * DAILY_RESERVE[level]:
+            return max(1.0, self._daily_reset_at - time.time())
+        needed = 1 + self.burst * BURST_RESERVE[level]
+        if self._tokens >= needed:
+            return 0.0
+        return (needed - self._tokens) / self.rate
+
+
+def _header_number(headers, name):
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+# One budget per process, shared by every session and worker thread
+request_budget = RateBudget()
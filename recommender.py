@@ -0,0 +1,156 @@
+# recommender.py
+import re
+
+import numpy as np
+
+# How much each ranking pulls the preference vector toward (or away from) a dog
+CHOICE_WEIGHTS = {"yes": 1.0, "maybe": 0.4, "no": -1.0}
+# Weight of an explicit user tag compared with a single ranking
+TAG_WEIGHT = 2.0
+MAX_DESCRIPTION_TERMS = 40
+
+STOPWORDS = frozenset("""
+about adopt adoption after also and are available been but can come dog dogs for from
+has have her him his how into its just looking meet more not our out she that the their
+them then there they this very was well what when who will with would you your
+""".split())
+
+_TOKEN_RE = re.compile(r"[a-z]{3,}")
+
+
+def _terms(text, limit=None):
+    seen = []
+    for term in _TOKEN_RE.findall((text or "").lower()):
+        if term in STOPWORDS or term in seen:
+            continue
+        seen.append(term)
+        if limit and len(seen) >= limit:
+            break
+    return seen
+
+
+def encode_features(dog):
+    """Return the sparse `{feature: weight}` encoding of a dog.
+
+    One-hot age/size/gender, breed tokens, and description terms. Token
+    groups are scaled by 1/sqrt(n) so long descriptions don't drown out the
+    categorical fields.
+    """
+    features = {
+        f"age:{dog.get('age', 'Unknown')}": 1.0,
+        f"size:{dog.get('size', 'Unknown')}": 1.0,
+        f"gender:{dog.get('gender', 'Unknown')}": 1.0,
+    }
+    for prefix, terms in (
+        ("breed", _terms(dog.get("breed"))),
+        ("desc", _terms(dog.get("description"), MAX_DESCRIPTION_TERMS)),
+    ):
+        if terms:
+            weight = 1.0 / np.sqrt(len(terms))
+            for term in terms:
+                features[f"{prefix}:{term}"] = weight
+    return features
+
+
+def tags_from_text(text):
+    """Turn free-text preferences ("small, calm terrier") into candidate feature names."""
+    tags = []
+    for word in re.findall(r"[a-z]+", (text or "").lower()):
+        tags.extend(f"{prefix}:{word}" for prefix in ("age", "size", "gender", "breed", "desc"))
+    return tags
+
+
+class Recommender:
+    """Scores dogs against a preference vector learned from the session's rankings.
+
+    Dogs are encoded once into a sparse feature matrix held as COO arrays;
+    scoring every encoded dog is a single `np.bincount` over the non-zeros,
+    so re-ranking thousands of candidates costs a few milliseconds.
+    """
+
+    def __init__(self):
+        self._vocab = {}
+        self._row_of = {}
+        self._rows = []
+        self._cols = []
+        self._vals = []
+        self._arrays = None
+        self._preference = np.zeros(0, dtype=np.float32)
+        self._tags = {}
+        self._tag_cache = None
+
+    def add(self, dogs):
+        """Encode dogs that haven't been seen yet."""
+        for dog in dogs:
+            if dog["id"] in self._row_of:
+                continue
+            row = len(self._row_of)
+            self._row_of[dog["id"]] = row
+            for feature, weight in encode_features(dog).items():
+                col = self._vocab.setdefault(feature, len(self._vocab))
+                self._rows.append(row)
+                self._cols.append(col)
+                self._vals.append(weight)
+            self._arrays = None
+
+    def _coo(self):
+        if self._arrays is None:
+            self._arrays = (
+                np.asarray(self._rows, dtype=np.int64),
+                np.asarray(self._cols, dtype=np.int64),
+                np.asarray(self._vals, dtype=np.float32),
+            )
+        return self._arrays
+
+    def _grow_preference(self):
+        if len(self._preference) < len(self._vocab):
+            self._preference = np.concatenate(
+                [self._preference, np.zeros(len(self._vocab) - len(self._preference), dtype=np.float32)]
+            )
+
+    def record(self, dog, choice, previous=None):
+        """Update the preference vector for a ranking (undoing `previous` on a re-rank)."""
+        self.add([dog])
+        self._grow_preference()
+        delta = CHOICE_WEIGHTS.get(choice, 0.0) - CHOICE_WEIGHTS.get(previous, 0.0)
+        if not delta:
+            return
+        rows, cols, vals = self._coo()
+        row = self._row_of[dog["id"]]
+        # Rows are appended in order, so each dog's non-zeros are contiguous
+        start = np.searchsorted(rows, row)
+        end = np.searchsorted(rows, row, side="right")
+        np.add.at(self._preference, cols[start:end], delta * vals[start:end])
+
+    def set_tags(self, tags):
+        """Boost explicit preferences given as feature names, e.g. `size:Small` or `breed:terrier`."""
+        self._tags = {tag.lower(): TAG_WEIGHT for tag in tags}
+        self._tag_cache = None
+
+    def _tag_vector(self):
+        if self._tag_cache is None or len(self._tag_cache) != len(self._vocab):
+            vector = np.zeros(len(self._vocab), dtype=np.float32)
+            if self._tags:
+                for feature, col in self._vocab.items():
+                    weight = self._tags.get(feature.lower())
+                    if weight:
+                        vector[col] = weight
+            self._tag_cache = vector
+        return self._tag_cache
+
+    def scores(self):
+        """Return a score for every encoded dog, indexed by row."""
+        self._grow_preference()
+        rows, cols, vals = self._coo()
+        weights = self._preference + self._tag_vector()
+        return np.bincount(rows, weights=vals * weights[cols], minlength=len(self._row_of))
+
+    def rerank(self, dogs):
+        """Return `dogs` ordered best match first (stable for ties)."""
+        if len(dogs) < 2:
+            return list(dogs)
+        self.add(dogs)
+        scores = self.scores()
+        candidate_scores = scores[[self._row_of[dog["id"]] for dog in dogs]]
+        order = np.argsort(-candidate_scores, kind="stable")
+        return [dogs[i] for i in order]
@@ -0,0 +1,89 @@
+# seen_set.py
+import hashlib
+import math
+
+# Keep exact ids up to this many, then switch to a Bloom filter
+EXACT_LIMIT = 5000
+# Sizing for the Bloom filter once a history outgrows the exact set
+BLOOM_CAPACITY = 100000
+BLOOM_ERROR_RATE = 0.001
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over string keys.
+
+    Never reports a member as missing; reports a non-member as present with
+    probability about `error_rate` while it holds at most `capacity` keys.
+    """
+
+    def __init__(self, capacity=BLOOM_CAPACITY, error_rate=BLOOM_ERROR_RATE):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(str(key).encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key):
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class SeenSet:
+    """Animal ids one user has already been shown or ranked.
+
+    Holds exact ids while the history is small and folds them into a Bloom
+    filter past `exact_limit`, so memory stays bounded for heavy users at
+    the cost of rarely skipping an unseen dog.
+    """
+
+    def __init__(self, exact_limit=EXACT_LIMIT):
+        self.exact_limit = exact_limit
+        self._ids = set()
+        self._bloom = None
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, animal_id):
+        if animal_id in self._ids:
+            return True
+        return self._bloom is not None and str(animal_id) in self._bloom
+
+    def add(self, animal_id):
+        if animal_id in self:
+            return
+        self._count += 1
+        if self._bloom is not None:
+            self._bloom.add(str(animal_id))
+            return
+        self._ids.add(animal_id)
+        if len(self._ids) > self.exact_limit:
+            self._bloom = BloomFilter()
+            for seen_id in self._ids:
+                self._bloom.add(str(seen_id))
+            self._ids = set()
+
+    def update(self, animal_ids):
+        for animal_id in animal_ids:
+            self.add(animal_id)
+
+    def unseen(self, items, key=lambda item: item["id"]):
+        """Return the items not seen yet, dropping repeats within `items` too."""
+        fresh = []
+        batch = set()
+        for item in items:
+            animal_id = key(item)
+            if animal_id in batch or animal_id in self:
+                continue
+            batch.add(animal_id)
+            fresh.append(item)
+        return fresh
@@ -0,0 +1,110 @@
+# summaries.py
+import html
+import re
+import threading
+from collections import OrderedDict
+
+import metrics
+
+BREED_LIMIT = 50
+PREVIEW_LIMIT = 100
+MAX_ENTRIES = 5000
+NO_DESCRIPTION = "No description available."
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_SPACE_RE = re.compile(r"\s+")
+_SPACE_BEFORE_PUNCT_RE = re.compile(r"\s+([.,!?;:])")
+# Shelter boilerplate that says nothing about the dog itself
+_BOILERPLATE_RE = re.compile(
+    r"(please (fill out|submit|complete) (an|our) (adoption )?application[^.!]*[.!]?"
+    r"|(click|visit) (here|our website)[^.!]*[.!]?"
+    r"|for more information[^.!]*[.!]?)",
+    re.IGNORECASE,
+)
+
+
+def clean_text(text):
+    """Decode HTML entities (Petfinder sometimes double-encodes them), drop tags and boilerplate."""
+    if not text:
+        return ""
+    for _ in range(2):
+        decoded = html.unescape(text)
+        if decoded == text:
+            break
+        text = decoded
+    text = _TAG_RE.sub(" ", text)
+    text = _BOILERPLATE_RE.sub(" ", text)
+    text = _SPACE_RE.sub(" ", text).strip()
+    return _SPACE_BEFORE_PUNCT_RE.sub(r"\1", text)
+
+
+def truncate(text, limit):
+    """Cut `text` to at most `limit` characters, on a word boundary where possible."""
+    if len(text) <= limit:
+        return text
+    cut = text[:limit - 3]
+    if " " in cut[limit // 2:]:
+        cut = cut[:cut.rindex(" ")]
+    return cut.rstrip(" ,.;:-") + "..."
+
+
+def summarize(dog):
+    """Card-ready fields for a normalized dog: cleaned text, truncations and a one-line summary."""
+    description = clean_text(dog.get("description")) or NO_DESCRIPTION
+    breed = clean_text(dog.get("breed")) or "Mixed Breed"
+    breed_display = truncate(breed, BREED_LIMIT)
+    traits = [dog.get("age"), dog.get("gender"), dog.get("size"), breed_display]
+    summary = " · ".join(str(t) for t in traits if t and t != "Unknown")
+    location = dog.get("location")
+    if location and location != "Unknown":
+        summary += f" in {location}"
+    return {
+        "description": description,
+        "breed_display": breed_display,
+        "description_preview": truncate(description, PREVIEW_LIMIT),
+        "summary": summary,
+    }
+
+
+class SummaryCache:
+    """Bounded LRU of summaries keyed by animal id and listing version.
+
+    The version is Petfinder's `status_changed_at` (falling back to
+    `published_at`), so a listing is only summarized again after it changed.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, dog):
+        key = dog.get("id")
+        version = dog.get("status_changed_at") or dog.get("published_at")
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                metrics.inc("petlights_cache_lookups_total", cache="summary", result="hit")
+                return entry[1]
+        metrics.inc("petlights_cache_lookups_total", cache="summary", result="miss")
+        fields = summarize(dog)
+        if key is None:
+            return fields
+        with self._lock:
+            self._entries[key] = (version, fields)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return fields
+
+
+# Shared by every normalization in the process
+summary_cache = SummaryCache()
+
+
+def card_fields(dog):
+    """The summarized fields for `dog`, reusing ones added at normalization time."""
+    if "summary" in dog:
+        return dog
+    return summary_cache.get(dog)
@@ -0,0 +1,55 @@
+# swipe_component/__init__.py
+import os
+
+import streamlit.components.v1 as components
+
+from summaries import card_fields
+
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend")
+
+# How many upcoming cards the browser holds (and preloads photos for)
+PRELOAD_COUNT = 8
+# Sync after this many decisions, or after IDLE_MS without a keystroke
+BATCH_SIZE = 5
+IDLE_MS = 1500
+
+_component = components.declare_component("swipe_queue", path=FRONTEND_DIR)
+
+
+def card_payload(dog):
+    """The subset of a dog the browser needs to draw a card."""
+    card = card_fields(dog)
+    return {
+        "id": dog["id"],
+        "name": dog["name"],
+        "breed": card["breed_display"],
+        "age": dog["age"],
+        "gender": dog["gender"],
+        "size": dog.get("size", "Unknown"),
+        "photo": dog["photo"],
+        "url": dog["url"],
+        "description": card["description_preview"],
+    }
+
+
+def swipe_queue(dogs, last_batch_id=0, on_change=None, batch_size=BATCH_SIZE, idle_ms=IDLE_MS, key="swipe_queue"):
+    """Render a client-side swipe deck over `dogs`.
+
+    Y/M/N keys and the on-card buttons rank instantly in the browser. Decisions
+    are queued and sent back as one batch, `{"batch_id": int, "decisions":
+    [{"id": ..., "choice": "yes" | "maybe" | "no"}, ...]}`, once `batch_size`
+    are pending or the user has been idle for `idle_ms`. Returns the most
+    recent batch (or None); callers must skip batch ids they already applied
+    and pass the last one back as `last_batch_id`, so a remounted component
+    keeps numbering from there. Use `on_change` to apply a batch before the
+    rerun renders, reading it from `st.session_state[key]`.
+    """
+    return _component(
+        cards=[card_payload(dog) for dog in dogs],
+        lastBatchId=last_batch_id,
+        batchSize=batch_size,
+        idleMs=idle_ms,
+        key=key,
+        default=None,
+        on_change=on_change,
+    )
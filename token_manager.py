@@ -0,0 +1,106 @@
+# token_manager.py
+import os
+import threading
+import time
+
+import metrics
+from storage import atomic_write_json, file_lock, read_json
+
+TOKEN_STORE = os.getenv("PETFINDER_TOKEN_STORE", "token_cache.json")
+# Refresh this many seconds before the token actually expires
+REFRESH_MARGIN = 120
+
+
+class TokenManager:
+    """Caches an OAuth token in memory and on disk, refreshing it once before expiry.
+
+    `fetch_token` must return the parsed token response (a dict with
+    `access_token` and `expires_in`) or None on failure.
+    """
+
+    def __init__(self, fetch_token, client_id, store_path=TOKEN_STORE, refresh_margin=REFRESH_MARGIN):
+        self._fetch_token = fetch_token
+        self._client_id = client_id
+        self._store_path = store_path
+        self._refresh_margin = refresh_margin
+        # Guards the token fields; never held across a network call
+        self._lock = threading.Lock()
+        # Held by whichever thread is refreshing; background refreshes never wait on it
+        self._refresh_lock = threading.Lock()
+        self._token = None
+        self._expires_at = 0.0
+
+    def get(self):
+        """Return a valid access token, fetching one only when none is usable."""
+        now = time.time()
+        if self._token and now < self._expires_at - self._refresh_margin:
+            return self._token
+        if self._token and now < self._expires_at:
+            # Still valid: hand it out and refresh off the hot path
+            self._refresh_in_background()
+            return self._token
+
+        with self._refresh_lock:
+            if not self._token or time.time() >= self._expires_at:
+                self._refresh()
+            return self._token
+
+    def invalidate(self):
+        """Drop the current token, e.g. after the API rejected it with a 401."""
+        with self._lock:
+            self._token = None
+            self._expires_at = 0.0
+            with file_lock(self._store_path):
+                stored = read_json(self._store_path)
+                if stored and stored.get("client_id") == self._client_id:
+                    atomic_write_json(self._store_path, {})
+
+    def _refresh_in_background(self):
+        if not self._refresh_lock.acquire(blocking=False):
+            # A refresh is already under way
+            return
+
+        def run():
+            try:
+                if time.time() >= self._expires_at - self._refresh_margin:
+                    self._refresh()
+            finally:
+                self._refresh_lock.release()
+
+        threading.Thread(target=run, name="petfinder-token-refresh", daemon=True).start()
+
+    def _refresh(self):
+        """Adopt a fresh token from the shared store or fetch a new one. Caller holds self._refresh_lock."""
+        with file_lock(self._store_path):
+            now = time.time()
+            stored = read_json(self._store_path)
+            if (
+                stored
+                and stored.get("client_id") == self._client_id
+                and stored.get("expires_at", 0) - self._refresh_margin > now
+            ):
+                # Another worker already refreshed it
+                self._set_token(stored["access_token"], stored["expires_at"])
+                metrics.inc("petlights_token_refreshes_total", source="store")
+                return
+
+            with metrics.timed("petlights_token_fetch_seconds"):
+                token_data = self._fetch_token()
+            metrics.inc("petlights_token_refreshes_total", source="api" if token_data else "failed")
+            if not token_data or not token_data.get("access_token"):
+                return
+
+            self._set_token(token_data["access_token"], now + int(token_data.get("expires_in", 3600)))
+            try:
+                atomic_write_json(self._store_path, {
+                    "client_id": self._client_id,
+                    "access_token": self._token,
+                    "expires_at": self._expires_at,
+                })
+            except OSError as e:
+                print(f"Error saving token: {e}")
+
+    def _set_token(self, token, expires_at):
+        with self._lock:
+            self._token = token
+            self._expires_at = expires_at